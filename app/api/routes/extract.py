@@ -2,11 +2,13 @@
 
 from __future__ import annotations
 
-from functools import lru_cache
+from collections.abc import AsyncIterator
 from pathlib import Path
 import time
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, BackgroundTasks, Depends
+from fastapi.sse import EventSourceResponse, ServerSentEvent
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 
 from app import __version__
 from app.core.config import Settings, get_settings
@@ -17,6 +19,8 @@ from app.core.errors import (
     domain_error_to_http_exception,
 )
 from app.models.schemas import (
+    ExtractionBatchRequest,
+    ExtractionBatchResponse,
     ExtractionRequest,
     ExtractionRequestV2,
     ExtractionResponse,
@@ -28,31 +32,52 @@ from app.services.docling_service import DoclingAdapter
 from app.services.extraction_service import ExtractionService
 from app.services.gcs_download_service import GCSDownloader
 from app.services.langextract_service import LangExtractAdapter
+from app.services.temp_files import remove_temp_file
 
 router = APIRouter()
 
 
-@lru_cache(maxsize=1)
+# Plain module globals rather than functools.cache: these run on every request, and the
+# app lifespan populates them at startup so the hot path is a single None check.
+_extraction_service: ExtractionService | None = None
+_document_downloader: DocumentDownloader | None = None
+_gcs_downloader: GCSDownloader | None = None
+_gcs_downloader_resolved = False
+
+
 def get_extraction_service() -> ExtractionService:
-    settings = get_settings()
-    return ExtractionService(
-        settings=settings,
-        docling_adapter=DoclingAdapter(),
-        langextract_adapter=LangExtractAdapter(settings),
-    )
+    global _extraction_service
+    if _extraction_service is None:
+        settings = get_settings()
+        _extraction_service = ExtractionService(
+            settings=settings,
+            docling_adapter=DoclingAdapter(settings),
+            langextract_adapter=LangExtractAdapter(settings),
+        )
+    return _extraction_service
 
 
-@lru_cache(maxsize=1)
 def get_document_downloader() -> DocumentDownloader:
-    return DocumentDownloader(settings=get_settings())
+    global _document_downloader
+    if _document_downloader is None:
+        _document_downloader = DocumentDownloader(settings=get_settings())
+    return _document_downloader
+
+
+async def close_document_downloader() -> None:
+    global _document_downloader
+    if _document_downloader is not None:
+        await _document_downloader.aclose()
+        _document_downloader = None
 
 
-@lru_cache(maxsize=1)
 def get_gcs_downloader() -> GCSDownloader | None:
-    settings = get_settings()
-    if not settings.gcs_credentials:
-        return None
-    return GCSDownloader(settings=settings)
+    global _gcs_downloader, _gcs_downloader_resolved
+    if not _gcs_downloader_resolved:
+        settings = get_settings()
+        _gcs_downloader = GCSDownloader(settings=settings) if settings.gcs_credentials else None
+        _gcs_downloader_resolved = True
+    return _gcs_downloader
 
 
 @router.post("/v1/extract", response_model=ExtractionResponse)
@@ -66,9 +91,45 @@ def extract_document(
         raise domain_error_to_http_exception(exc) from exc
 
 
+@router.post("/v1/extract/batch", response_model=ExtractionBatchResponse)
+def extract_documents_batch(
+    request: ExtractionBatchRequest,
+    service: ExtractionService = Depends(get_extraction_service),
+) -> ExtractionBatchResponse:
+    try:
+        return ExtractionBatchResponse.model_construct(results=service.process_batch(request.requests))
+    except DomainError as exc:
+        raise domain_error_to_http_exception(exc) from exc
+
+
+@router.post("/v1/extract/stream", response_class=EventSourceResponse)
+async def extract_document_stream(
+    request: ExtractionRequest,
+    service: ExtractionService = Depends(get_extraction_service),
+) -> AsyncIterator[ServerSentEvent]:
+    """Same work as `/v1/extract`, streamed as Server-Sent Events.
+
+    Emits a `stage` event as OCR and extraction start, then one `result` event carrying the
+    `ExtractionResponse`. The status is already 200 once streaming starts, so failures arrive
+    as an `error` event with the same `code`/`message` body the JSON routes return.
+    """
+
+    try:
+        async for item in iterate_in_threadpool(service.process_stream(request)):
+            if isinstance(item, str):
+                yield ServerSentEvent(event="stage", data={"stage": item})
+            else:
+                yield ServerSentEvent(event="result", data=item)
+    except DomainError as exc:
+        yield ServerSentEvent(
+            event="error", data={"code": exc.error_code, "message": str(exc)}
+        )
+
+
 @router.post("/v2/extract", response_model=ExtractionResponseV2)
-def extract_document_v2(
+async def extract_document_v2(
     request: ExtractionRequestV2,
+    background_tasks: BackgroundTasks,
     service: ExtractionService = Depends(get_extraction_service),
     downloader: DocumentDownloader = Depends(get_document_downloader),
     gcs_downloader: GCSDownloader | None = Depends(get_gcs_downloader),
@@ -76,10 +137,12 @@ def extract_document_v2(
 ) -> ExtractionResponseV2:
     download_ms: int | None = None
     temp_path: Path | None = None
+    document: tuple[bytes, str] | None = None
     resolved_bucket: str | None = None
+    cleanup_deferred = False
 
     try:
-        t0 = time.perf_counter()
+        t0 = time.perf_counter_ns()
         if request.object_key:
             resolved_bucket = request.bucket or settings.gcs_default_bucket
             if not resolved_bucket:
@@ -88,23 +151,39 @@ def extract_document_v2(
                 )
             if gcs_downloader is None:
                 raise GCSDownloadError("GCS downloader is not configured")
-            temp_path = gcs_downloader.download(resolved_bucket, request.object_key)
+            if settings.in_memory_downloads:
+                document = await run_in_threadpool(
+                    gcs_downloader.download_to_memory, resolved_bucket, request.object_key
+                )
+            else:
+                temp_path = await run_in_threadpool(
+                    gcs_downloader.download, resolved_bucket, request.object_key
+                )
         else:
             if not request.document_url:
                 raise InvalidDocumentSourceError(
                     "document_url is required when object_key is not provided"
                 )
-            temp_path = downloader.download(request.document_url)
-        download_ms = _to_ms(t0)
-
-        result = service.process_from_path(
-            temp_path,
-            document_type=request.document_type,
-            include_ocr_text=request.include_ocr_text,
-            include_extractions=request.include_extractions,
-        )
+            if settings.in_memory_downloads:
+                document = await downloader.download_to_memory(request.document_url)
+            else:
+                temp_path = await downloader.download(request.document_url)
+        download_ms = _elapsed_ms(t0)
+
+        options = {
+            "document_type": request.document_type,
+            "include_ocr_text": request.include_ocr_text,
+            "include_extractions": request.include_extractions,
+        }
+        # The whole pipeline runs in one threadpool job, so the service starts its OCR timer
+        # once a worker picks the job up; concurrent OCR is bounded by OCR_MAX_INFLIGHT.
+        if document is not None:
+            result = await run_in_threadpool(service.process_from_bytes, *document, **options)
+        else:
+            result = await run_in_threadpool(service.process_from_path, temp_path, **options)
 
-        return ExtractionResponseV2(
+        # Every field is already a validated model or primitive; skip re-validation.
+        response = ExtractionResponseV2.model_construct(
             document_id=request.document_id,
             organization_id=request.organization_id,
             property_id=request.property_id,
@@ -117,7 +196,7 @@ def extract_document_v2(
             fields=result.fields,
             extractions=result.extractions,
             issues=result.issues,
-            timings_ms=TimingsMs(
+            timings_ms=TimingsMs.model_construct(
                 validation=None,
                 download=download_ms,
                 ocr=result.timings_ms.ocr,
@@ -126,11 +205,16 @@ def extract_document_v2(
                 total=result.timings_ms.total,
             ),
         )
+        # Delete the temp file after the response is sent rather than before it.
+        if temp_path is not None:
+            background_tasks.add_task(remove_temp_file, temp_path)
+            cleanup_deferred = True
+        return response
     except DomainError as exc:
         raise domain_error_to_http_exception(exc) from exc
     finally:
-        if temp_path is not None:
-            temp_path.unlink(missing_ok=True)
+        if temp_path is not None and not cleanup_deferred:
+            remove_temp_file(temp_path)
 
 
 @router.get("/healthz")
@@ -141,5 +225,5 @@ def healthz() -> dict[str, str]:
     }
 
 
-def _to_ms(start_time: float) -> int:
-    return int(round((time.perf_counter() - start_time) * 1000))
+def _elapsed_ms(start_ns: int) -> int:
+    return (time.perf_counter_ns() - start_ns) // 1_000_000
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from functools import lru_cache
+from functools import cache
 from pathlib import Path
 
 from pydantic import Field
@@ -21,6 +21,7 @@ class Settings(BaseSettings):
 
     openai_api_key: str | None = Field(default=None, alias="OPENAI_API_KEY")
     openai_model: str = Field(default="gpt-4o", alias="OPENAI_MODEL")
+    openai_max_concurrency: int = Field(default=8, alias="OPENAI_MAX_CONCURRENCY")
     image_directory: Path = Field(default=Path("./img"), alias="IMAGE_DIRECTORY")
     gcs_credentials: str | None = Field(default=None, alias="GCS_CREDENTIALS")
     gcs_default_bucket: str | None = Field(default=None, alias="GCS_DEFAULT_BUCKET")
@@ -29,9 +30,43 @@ class Settings(BaseSettings):
         alias="ALLOWED_EXTENSIONS",
     )
     ocr_preview_chars: int = Field(default=240, alias="OCR_PREVIEW_CHARS")
+    temp_dir: Path | None = Field(default=None, alias="TEMP_DIR")
+    temp_file_max_age_seconds: int = Field(default=3600, alias="TEMP_FILE_MAX_AGE_SECONDS")
+    in_memory_downloads: bool = Field(default=False, alias="IN_MEMORY_DOWNLOADS")
+    ocr_max_inflight: int = Field(default=2, alias="OCR_MAX_INFLIGHT")
+    ocr_max_attempts: int = Field(default=3, alias="OCR_MAX_ATTEMPTS")
+    preload_ocr_models: bool = Field(default=True, alias="PRELOAD_OCR_MODELS")
+    ocr_device: str = Field(default="auto", alias="OCR_DEVICE")
+    ocr_num_threads: int | None = Field(default=None, alias="OCR_NUM_THREADS")
+    ocr_det_model_path: Path | None = Field(default=None, alias="OCR_DET_MODEL_PATH")
+    ocr_rec_model_path: Path | None = Field(default=None, alias="OCR_REC_MODEL_PATH")
+    ocr_cls_model_path: Path | None = Field(default=None, alias="OCR_CLS_MODEL_PATH")
+    ocr_page_workers: int | None = Field(default=None, alias="OCR_PAGE_WORKERS")
+    ocr_parallel_min_pages: int = Field(default=4, alias="OCR_PARALLEL_MIN_PAGES")
+    ocr_batch_size: int | None = Field(default=None, alias="OCR_BATCH_SIZE")
+    extraction_cache_size: int = Field(default=128, alias="EXTRACTION_CACHE_SIZE")
+    extraction_cache_dir: Path | None = Field(default=None, alias="EXTRACTION_CACHE_DIR")
+    extraction_max_input_chars: int = Field(default=20000, alias="EXTRACTION_MAX_INPUT_CHARS")
+    langextract_max_char_buffer: int = Field(default=1000, alias="LANGEXTRACT_MAX_CHAR_BUFFER")
+    langextract_max_attempts: int = Field(default=3, alias="LANGEXTRACT_MAX_ATTEMPTS")
 
+    @property
+    def allowed_extension_set(self) -> frozenset[str]:
+        """Hashed view of `allowed_extensions` for per-request membership checks.
 
-@lru_cache(maxsize=1)
+        Derived on access rather than stored, so `model_copy(update=...)` cannot leave it
+        stale; the frozenset is still built only once per distinct extension tuple.
+        """
+
+        return _extension_set(self.allowed_extensions)
+
+
+@cache
+def _extension_set(extensions: tuple[str, ...]) -> frozenset[str]:
+    return frozenset(extensions)
+
+
+@cache
 def get_settings() -> Settings:
     """Return cached settings instance."""
 
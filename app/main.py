@@ -1,14 +1,119 @@
 """FastAPI ASGI app bootstrap."""
 
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from app import __version__
-from app.api.routes.extract import router as extract_router
+from app.api.routes.extract import (
+    close_document_downloader,
+    get_document_downloader,
+    get_extraction_service,
+    get_gcs_downloader,
+    router as extract_router,
+)
+from app.core.config import get_settings
+from app.core.errors import DoclingServiceError, GCSDownloadError
+from app.services.gcs_download_service import GCSDownloader
+from app.services.temp_files import reap_orphan_temp_files, temp_directory
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    settings = get_settings()
+    get_document_downloader()
+    gcs_downloader = get_gcs_downloader()
+    if gcs_downloader is not None:
+        await run_in_threadpool(_preload_gcs_client, gcs_downloader)
+    if settings.preload_ocr_models:
+        await run_in_threadpool(_preload_ocr_models)
+
+    reaper: asyncio.Task[None] | None = None
+    if settings.temp_file_max_age_seconds > 0:
+        reaper = asyncio.create_task(_reap_temp_files_forever(settings.temp_file_max_age_seconds))
+
+    yield
+
+    if reaper is not None:
+        reaper.cancel()
+    await close_document_downloader()
+
+
+def _preload_ocr_models() -> None:
+    """Load the OCR models behind the shared extraction service so the first request skips it."""
+
+    try:
+        get_extraction_service().docling_adapter.warm_up()
+    except DoclingServiceError as exc:
+        logger.warning("OCR model preload failed; will retry on first request: %s", exc)
+
+
+def _preload_gcs_client(downloader: GCSDownloader) -> None:
+    """Pay the google-cloud import and client setup at startup instead of on the first download."""
+
+    try:
+        downloader.warm_up()
+    except GCSDownloadError as exc:
+        logger.warning("GCS client preload failed; will retry on first download: %s", exc)
+
+
+async def _reap_temp_files_forever(max_age_seconds: int) -> None:
+    """Periodically remove download temp files that a crashed request never cleaned up."""
+
+    directory = temp_directory(get_settings())
+    while True:
+        removed = await run_in_threadpool(
+            reap_orphan_temp_files, directory, max_age_seconds=max_age_seconds
+        )
+        if removed:
+            logger.info("Removed %d orphaned temp files from %s", removed, directory)
+        await asyncio.sleep(max(max_age_seconds / 4, 60))
+
+
+class HealthzMiddleware:
+    """Answer `GET /healthz` before CORS and routing run; probes hit it many times a second.
+
+    The router's `/healthz` stays registered for the OpenAPI docs and returns the same body.
+    """
+
+    _BODY = json.dumps({"status": "healthy", "version": __version__}).encode()
+    _HEADERS = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(_BODY)).encode()),
+    ]
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["path"] != "/healthz"
+            or scope["method"] not in ("GET", "HEAD")
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        await send({"type": "http.response.start", "status": 200, "headers": self._HEADERS})
+        body = b"" if scope["method"] == "HEAD" else self._BODY
+        await send({"type": "http.response.body", "body": body})
+
 
 app = FastAPI(
     title="Document Extraction PoC",
     version=__version__,
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -18,5 +123,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Added last so it is the outermost middleware.
+app.add_middleware(HealthzMiddleware)
 
 app.include_router(extract_router)
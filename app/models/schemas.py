@@ -102,6 +102,10 @@ class ExtractionRequest(BaseModel):
     include_extractions: bool = True
 
 
+class ExtractionBatchRequest(BaseModel):
+    requests: list[ExtractionRequest] = Field(min_length=1, max_length=16)
+
+
 class ExtractionRequestV2(BaseModel):
     document_id: str
     organization_id: str
@@ -140,6 +144,10 @@ class ExtractionResponse(BaseModel):
     timings_ms: TimingsMs
 
 
+class ExtractionBatchResponse(BaseModel):
+    results: list[ExtractionResponse]
+
+
 class ExtractionResponseV2(BaseModel):
     document_id: str
     organization_id: str
@@ -2,71 +2,382 @@
 
 from __future__ import annotations
 
+import copy
+import os
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import cache, partial
+from io import BytesIO
 from pathlib import Path
 from typing import Any
 
+from app.core.config import Settings, get_settings
 from app.core.errors import DoclingServiceError
 
+# Docling renders at 3x (216 DPI) for RapidOCR; keep the parallel path at the same resolution.
+PDF_RENDER_SCALE = 3
+OCR_RETRY_BASE_DELAY_SECONDS = 0.5
+OCR_RETRY_MAX_DELAY_SECONDS = 4.0
+# ONNXRuntime allocation failures surface as generic RuntimeErrors; match on their text.
+_TRANSIENT_ERROR_MARKERS = (
+    "out of memory",
+    "bad_alloc",
+    "bad allocation",
+    "failed to allocate",
+    "resource temporarily unavailable",
+)
+
 
 class DoclingAdapter:
     """Convert identity document images/PDFs to OCR text using Docling + RapidOCR."""
 
-    def __init__(self) -> None:
-        self._converter = self._build_converter()
+    def __init__(self, settings: Settings | None = None) -> None:
+        self._settings = settings or get_settings()
+        self._converter = get_document_converter(self._settings)
+        self._page_workers = self._settings.ocr_page_workers or os.cpu_count() or 1
+        self._thread_local = threading.local()
+        self._rapidocr_template: Any = None
+        self._template_lock = threading.Lock()
+        self._inflight = threading.BoundedSemaphore(max(self._settings.ocr_max_inflight, 1))
+
+    def extract_text(self, image_path: Path) -> str:
+        """Run OCR and return plain text."""
+
+        return self._run_with_retries(partial(self._extract_text, image_path))
+
+    def extract_text_from_bytes(self, data: bytes, filename: str) -> str:
+        """Run OCR on an in-memory document; `filename` tells Docling the input format."""
+
+        return self._run_with_retries(partial(self._extract_text_from_bytes, data, filename))
+
+    def warm_up(self) -> None:
+        """Load the OCR models now, ahead of the first document.
+
+        Docling builds a format's pipeline, and with it the RapidOCR ONNX sessions, on the
+        first `convert()` of that format; constructing the converter loads nothing.
+        """
 
-    def _build_converter(self) -> Any:
         try:
             from docling.datamodel.base_models import InputFormat
-            from docling.datamodel.pipeline_options import PdfPipelineOptions, RapidOcrOptions
-            PdfFormatOption = None
-            try:
-                from docling.document_converter import (
-                    DocumentConverter,
-                    ImageFormatOption,
-                    PdfFormatOption,
-                )
-            except ImportError:
-                from docling.document_converter import DocumentConverter
-                from docling.datamodel.pipeline_options import ImageFormatOption  # type: ignore
-                try:
-                    from docling.datamodel.pipeline_options import PdfFormatOption  # type: ignore
-                except ImportError:
-                    PdfFormatOption = None
         except Exception as exc:  # pragma: no cover - import guard
-            raise DoclingServiceError(f"Unable to initialize Docling: {exc}") from exc
+            raise DoclingServiceError(f"Unable to import Docling: {exc}") from exc
 
         try:
-            pipeline_options = PdfPipelineOptions()
-            pipeline_options.do_ocr = True
-            # ID extraction only needs OCR text; table reconstruction is expensive and unnecessary.
-            pipeline_options.do_table_structure = False
-            pipeline_options.ocr_options = RapidOcrOptions(
-                backend="onnxruntime",
-                lang=["english"],
-                force_full_page_ocr=True,
-            )
+            for input_format in (InputFormat.IMAGE, InputFormat.PDF):
+                self._converter.initialize_pipeline(input_format)
+        except Exception as exc:
+            raise DoclingServiceError(f"Unable to load Docling OCR models: {exc}") from exc
 
-            format_options: dict[Any, Any] = {
-                InputFormat.IMAGE: ImageFormatOption(
-                    pipeline_options=pipeline_options,
-                )
-            }
-            if PdfFormatOption is not None:
-                format_options[InputFormat.PDF] = PdfFormatOption(
-                    pipeline_options=pipeline_options,
-                )
+    def _run_with_retries(self, operation: Callable[[], str]) -> str:
+        """Bound in-flight OCR and retry transient runtime failures with jittered backoff."""
+
+        attempt = 1
+        while True:
+            try:
+                with self._inflight:
+                    return operation()
+            except DoclingServiceError as exc:
+                if attempt >= self._settings.ocr_max_attempts or not _is_transient(exc):
+                    raise
 
-            return DocumentConverter(
-                format_options=format_options
+            delay = min(
+                OCR_RETRY_BASE_DELAY_SECONDS * 2 ** (attempt - 1),
+                OCR_RETRY_MAX_DELAY_SECONDS,
             )
-        except Exception as exc:
-            raise DoclingServiceError(f"Unable to configure Docling pipeline: {exc}") from exc
+            time.sleep(random.uniform(0, delay))
+            attempt += 1
 
-    def extract_text(self, image_path: Path) -> str:
-        """Run OCR and return plain text."""
+    def _extract_text(self, image_path: Path) -> str:
+        if image_path.suffix.lower() == ".pdf" and self._page_workers > 1:
+            text = self.extract_text_parallel(image_path)
+            if text is not None:
+                return text
 
         try:
             result = self._converter.convert(source=str(image_path))
             return result.document.export_to_text()
         except Exception as exc:
             raise DoclingServiceError(f"Docling OCR failed: {exc}") from exc
+
+    def _extract_text_from_bytes(self, data: bytes, filename: str) -> str:
+        if Path(filename).suffix.lower() == ".pdf" and self._page_workers > 1:
+            text = self.extract_text_parallel(data)
+            if text is not None:
+                return text
+
+        try:
+            from docling.datamodel.base_models import DocumentStream
+        except Exception as exc:  # pragma: no cover - import guard
+            raise DoclingServiceError(f"Unable to import Docling: {exc}") from exc
+
+        try:
+            stream = DocumentStream(name=filename, stream=BytesIO(data))
+            result = self._converter.convert(source=stream)
+            return result.document.export_to_text()
+        except Exception as exc:
+            raise DoclingServiceError(f"Docling OCR failed: {exc}") from exc
+
+    def extract_text_parallel(self, pdf: Path | bytes) -> str | None:
+        """OCR PDF pages concurrently with RapidOCR, bypassing Docling's sequential page loop.
+
+        Returns None when the PDF is too short to benefit, so the caller can use Docling.
+        """
+
+        try:
+            import pypdfium2 as pdfium
+            from docling.utils.locks import pypdfium2_lock
+        except Exception as exc:  # pragma: no cover - import guard
+            raise DoclingServiceError(f"Unable to import PDF renderer: {exc}") from exc
+
+        try:
+            with pypdfium2_lock:
+                document = pdfium.PdfDocument(pdf if isinstance(pdf, bytes) else str(pdf))
+                page_count = len(document)
+
+            try:
+                if page_count <= self._settings.ocr_parallel_min_pages:
+                    return None
+
+                executor = _get_page_executor(self._page_workers)
+                futures = deque(
+                    executor.submit(self._ocr_pdf_page, document, pypdfium2_lock, index)
+                    for index in range(page_count)
+                )
+                return "\n".join(_iter_page_texts(futures))
+            finally:
+                with pypdfium2_lock:
+                    document.close()
+        except DoclingServiceError:
+            raise
+        except Exception as exc:
+            raise DoclingServiceError(f"Parallel PDF OCR failed: {exc}") from exc
+
+    def _ocr_pdf_page(self, pdf: Any, pdfium_lock: threading.Lock, index: int) -> str:
+        # pdfium is not thread-safe: render under Docling's global lock, OCR outside it.
+        with pdfium_lock:
+            page = pdf[index]
+            try:
+                image = page.render(scale=PDF_RENDER_SCALE).to_numpy()
+            finally:
+                page.close()
+
+        result = self._get_rapidocr_engine()(image)
+        return "\n".join(result.txts or ())
+
+    def _get_rapidocr_engine(self) -> Any:
+        # One engine per thread: RapidOCR's detector keeps per-call state on the instance.
+        engine = getattr(self._thread_local, "engine", None)
+        if engine is None:
+            engine = _share_rapidocr_sessions(self._get_rapidocr_template())
+            self._thread_local.engine = engine
+        return engine
+
+    def _get_rapidocr_template(self) -> Any:
+        with self._template_lock:
+            if self._rapidocr_template is None:
+                self._rapidocr_template = _build_rapidocr_engine(self._settings)
+            return self._rapidocr_template
+
+
+def _is_transient(error: DoclingServiceError) -> bool:
+    cause = error.__cause__
+    if isinstance(cause, MemoryError):
+        return True
+    message = f"{error} {cause or ''}".lower()
+    return any(marker in message for marker in _TRANSIENT_ERROR_MARKERS)
+
+
+def _iter_page_texts(futures: deque[Future[str]]) -> Iterator[str]:
+    """Yield page texts in page order, dropping each future once consumed.
+
+    Finished pages are then referenced only by the consumer's join rather than also by
+    a results list and the pending futures, keeping peak memory near one copy of the text.
+    """
+
+    while futures:
+        text = futures.popleft().result()
+        if text:
+            yield text
+
+
+@cache
+def _get_page_executor(max_workers: int) -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ocr-page")
+
+
+_converters: dict[tuple[Any, ...], Any] = {}
+_converters_lock = threading.Lock()
+
+
+def get_document_converter(settings: Settings | None = None) -> Any:
+    """Return the process-wide Docling converter for `settings`' OCR options.
+
+    The converter keeps the pipelines, and their RapidOCR ONNX sessions, that it builds on
+    the first conversion of each format (see `DoclingAdapter.warm_up`); caching it means
+    each process loads the models once per OCR configuration instead of per adapter.
+    """
+
+    settings = settings or get_settings()
+    key = _converter_key(settings)
+    with _converters_lock:
+        converter = _converters.get(key)
+        if converter is None:
+            converter = _converters[key] = _build_converter(settings)
+    return converter
+
+
+def _converter_key(settings: Settings) -> tuple[Any, ...]:
+    """The settings `_build_converter` reads; adapters that agree on them share a converter."""
+
+    return (
+        settings.ocr_device,
+        _ocr_num_threads(settings),
+        settings.ocr_batch_size,
+        settings.ocr_det_model_path,
+        settings.ocr_rec_model_path,
+        settings.ocr_cls_model_path,
+    )
+
+
+def _build_converter(settings: Settings) -> Any:
+    try:
+        from docling.datamodel.base_models import InputFormat
+        from docling.datamodel.pipeline_options import PdfPipelineOptions, RapidOcrOptions
+        try:
+            from docling.datamodel.accelerator_options import AcceleratorOptions
+        except ImportError:
+            from docling.datamodel.pipeline_options import AcceleratorOptions  # type: ignore
+        PdfFormatOption = None
+        try:
+            from docling.document_converter import (
+                DocumentConverter,
+                ImageFormatOption,
+                PdfFormatOption,
+            )
+        except ImportError:
+            from docling.document_converter import DocumentConverter
+            from docling.datamodel.pipeline_options import ImageFormatOption  # type: ignore
+            try:
+                from docling.datamodel.pipeline_options import PdfFormatOption  # type: ignore
+            except ImportError:
+                PdfFormatOption = None
+    except Exception as exc:  # pragma: no cover - import guard
+        raise DoclingServiceError(f"Unable to initialize Docling: {exc}") from exc
+
+    try:
+        pipeline_options = PdfPipelineOptions()
+        pipeline_options.do_ocr = True
+        # ID extraction only needs OCR text; table reconstruction is expensive and unnecessary.
+        pipeline_options.do_table_structure = False
+        # Pin the other optional stages off too so a Docling upgrade that flips a default
+        # can't silently add enrichment models (and their RAM) to the pipeline.
+        pipeline_options.do_code_enrichment = False
+        pipeline_options.do_formula_enrichment = False
+        pipeline_options.do_picture_classification = False
+        pipeline_options.do_picture_description = False
+        pipeline_options.generate_page_images = False
+        pipeline_options.generate_picture_images = False
+        pipeline_options.generate_table_images = False
+        pipeline_options.generate_parsed_pages = False
+        pipeline_options.ocr_options = RapidOcrOptions(
+            backend="onnxruntime",
+            lang=["english"],
+            force_full_page_ocr=True,
+            rapidocr_params=_ocr_batch_params(settings),
+            **_ocr_model_paths(settings),
+        )
+        # Device "cuda" makes RapidOCR request the CUDA execution provider (CPU remains the fallback).
+        pipeline_options.accelerator_options = AcceleratorOptions(
+            device=settings.ocr_device,
+            num_threads=_ocr_num_threads(settings),
+        )
+
+        format_options: dict[Any, Any] = {
+            InputFormat.IMAGE: ImageFormatOption(
+                pipeline_options=pipeline_options,
+            )
+        }
+        if PdfFormatOption is not None:
+            format_options[InputFormat.PDF] = PdfFormatOption(
+                pipeline_options=pipeline_options,
+            )
+
+        return DocumentConverter(
+            format_options=format_options
+        )
+    except Exception as exc:
+        raise DoclingServiceError(f"Unable to configure Docling pipeline: {exc}") from exc
+
+
+def _ocr_model_paths(settings: Settings) -> dict[str, str]:
+    """Model overrides, e.g. INT8-quantized RapidOCR exports; unset paths keep the bundled FP32 models."""
+
+    paths = {
+        "det_model_path": settings.ocr_det_model_path,
+        "rec_model_path": settings.ocr_rec_model_path,
+        "cls_model_path": settings.ocr_cls_model_path,
+    }
+    return {key: str(path) for key, path in paths.items() if path is not None}
+
+
+def _ocr_batch_params(settings: Settings) -> dict[str, int]:
+    """Text-line batch sizes for RapidOCR's classifier and recognizer.
+
+    Each page's detected lines are fed to ONNXRuntime in batches of this size, so larger
+    batches mean fewer session runs per page (worthwhile on GPU); unset keeps RapidOCR's 6.
+    """
+
+    if settings.ocr_batch_size is None:
+        return {}
+    batch_size = max(settings.ocr_batch_size, 1)
+    return {"Cls.cls_batch_num": batch_size, "Rec.rec_batch_num": batch_size}
+
+
+def _ocr_num_threads(settings: Settings) -> int:
+    """Split cores across concurrent OCR calls so ONNXRuntime intra-op pools don't oversubscribe."""
+
+    if settings.ocr_num_threads is not None:
+        return max(settings.ocr_num_threads, 1)
+    return max((os.cpu_count() or 1) // max(settings.ocr_max_inflight, 1), 1)
+
+
+def _share_rapidocr_sessions(template: Any) -> Any:
+    """Copy a RapidOCR engine for another thread while reusing its ONNX sessions.
+
+    ONNXRuntime sessions are safe to run concurrently, so every page thread shares one
+    copy of the det/cls/rec weights; only the detector, which stores its preprocessing
+    op per call, gets its own instance.
+    """
+
+    engine = copy.copy(template)
+    engine.text_det = copy.copy(template.text_det)
+    return engine
+
+
+def _build_rapidocr_engine(settings: Settings) -> Any:
+    try:
+        from rapidocr import RapidOCR
+    except Exception as exc:  # pragma: no cover - import guard
+        raise DoclingServiceError(f"Unable to import RapidOCR: {exc}") from exc
+
+    use_cuda = settings.ocr_device.lower().startswith("cuda")
+    params: dict[str, Any] = dict(_ocr_batch_params(settings))
+    for stage, path in (
+        ("Det", settings.ocr_det_model_path),
+        ("Cls", settings.ocr_cls_model_path),
+        ("Rec", settings.ocr_rec_model_path),
+    ):
+        # Page workers already run in parallel, so each engine gets a single intra-op thread.
+        params[f"{stage}.intra_op_num_threads"] = 1
+        params[f"{stage}.use_cuda"] = use_cuda
+        if path is not None:
+            params[f"{stage}.model_path"] = str(path)
+
+    try:
+        return RapidOCR(params=params)
+    except Exception as exc:
+        raise DoclingServiceError(f"Unable to initialize RapidOCR: {exc}") from exc
@@ -2,15 +2,18 @@
 
 from __future__ import annotations
 
+import os
 import tempfile
+from io import BytesIO
 from pathlib import Path
 from typing import BinaryIO
-from urllib.parse import urlparse
+from urllib.parse import SplitResult, urlsplit
 
 import httpx
 
 from app.core.config import Settings, get_settings
 from app.core.errors import DocumentDownloadError, InvalidDocumentURLError
+from app.services.temp_files import TEMP_FILE_PREFIX, remove_temp_file
 
 
 class DocumentDownloader:
@@ -20,49 +23,75 @@ class DocumentDownloader:
         self,
         *,
         settings: Settings | None = None,
-        http_client: httpx.Client | None = None,
+        http_client: httpx.AsyncClient | None = None,
         timeout_seconds: float = 30.0,
         max_download_bytes: int = 20 * 1024 * 1024,
         chunk_size: int = 64 * 1024,
+        write_buffer_size: int = 1024 * 1024,
     ) -> None:
         self.settings = settings or get_settings()
-        self.http_client = http_client
         self.timeout_seconds = timeout_seconds
         self.max_download_bytes = max_download_bytes
         self.chunk_size = chunk_size
-
-    def download(self, url: str) -> Path:
-        self._validate_url(url)
-        suffix = self._resolve_suffix(url)
-
-        temp_file = tempfile.NamedTemporaryFile(mode="wb", delete=False, suffix=suffix)
-        temp_path = Path(temp_file.name)
+        self.write_buffer_size = write_buffer_size
+        # One pooled client per downloader so repeat downloads reuse TCP/TLS connections.
+        self._owns_client = http_client is None
+        self.http_client = http_client or httpx.AsyncClient(
+            timeout=timeout_seconds,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        )
+
+    async def aclose(self) -> None:
+        if self._owns_client:
+            await self.http_client.aclose()
+
+    async def download(self, url: str) -> Path:
+        parsed = urlsplit(url)
+        self._validate_url(parsed)
+        suffix = self._resolve_suffix(parsed)
+
+        # A large write buffer coalesces network chunks into ~1 MiB writes, so the read loop
+        # issues a handful of write(2) calls per document; kernel writeback does the disk I/O.
+        fd, temp_name = tempfile.mkstemp(
+            prefix=TEMP_FILE_PREFIX, suffix=suffix, dir=self.settings.temp_dir
+        )
+        temp_path = Path(temp_name)
 
         try:
-            with temp_file:
-                self._stream_to_file(url, temp_file)
-            return temp_path
-        except DocumentDownloadError:
-            self._safe_unlink(temp_path)
+            with os.fdopen(fd, "wb", buffering=self.write_buffer_size) as temp_file:
+                await self._stream_to_file(url, temp_file)
+        except BaseException as exc:
+            # Also covers cancellation when the client disconnects mid-download.
+            remove_temp_file(temp_path)
+            if isinstance(exc, OSError):
+                raise DocumentDownloadError(f"Unable to write downloaded document: {exc}") from exc
             raise
-        except OSError as exc:
-            self._safe_unlink(temp_path)
-            raise DocumentDownloadError(f"Unable to write downloaded document: {exc}") from exc
+        return temp_path
+
+    async def download_to_memory(self, url: str) -> tuple[bytes, str]:
+        """Download into memory, skipping the temp file; returns (content, filename)."""
 
-    def _stream_to_file(self, url: str, output_file: BinaryIO) -> None:
-        if self.http_client is not None:
-            self._read_stream(self.http_client, url, output_file)
-            return
+        parsed = urlsplit(url)
+        self._validate_url(parsed)
+        suffix = self._resolve_suffix(parsed)
 
-        with httpx.Client(timeout=self.timeout_seconds, follow_redirects=True) as client:
-            self._read_stream(client, url, output_file)
+        buffer = BytesIO()
+        await self._stream_to_file(url, buffer)
+        return buffer.getvalue(), f"document{suffix}"
 
-    def _read_stream(self, client: httpx.Client, url: str, output_file: BinaryIO) -> None:
+    async def _stream_to_file(self, url: str, output_file: BinaryIO) -> None:
         total_bytes = 0
         try:
-            with client.stream("GET", url) as response:
+            async with self.http_client.stream("GET", url) as response:
                 response.raise_for_status()
-                for chunk in response.iter_bytes(chunk_size=self.chunk_size):
+                # Reject a declared oversize body before reading any of it.
+                content_length = response.headers.get("content-length", "")
+                if content_length.isdigit() and int(content_length) > self.max_download_bytes:
+                    raise DocumentDownloadError(
+                        f"Downloaded file exceeds limit of {self.max_download_bytes} bytes"
+                    )
+                async for chunk in response.aiter_bytes(chunk_size=self.chunk_size):
                     if not chunk:
                         continue
                     total_bytes += len(chunk)
@@ -80,22 +109,15 @@ class DocumentDownloader:
         except httpx.RequestError as exc:
             raise DocumentDownloadError(f"Document download failed: {exc}") from exc
 
-    def _validate_url(self, url: str) -> None:
-        parsed = urlparse(url)
+    def _validate_url(self, parsed: SplitResult) -> None:
         if parsed.scheme.lower() not in {"http", "https"}:
             raise InvalidDocumentURLError("Document URL must use http or https")
 
         if not parsed.hostname:
             raise InvalidDocumentURLError("Document URL must include a hostname")
 
-    def _resolve_suffix(self, url: str) -> str:
-        suffix = Path(urlparse(url).path).suffix.lower()
-        if suffix in self.settings.allowed_extensions:
+    def _resolve_suffix(self, parsed: SplitResult) -> str:
+        suffix = Path(parsed.path).suffix.lower()
+        if suffix in self.settings.allowed_extension_set:
             return suffix
         return ".png"
-
-    def _safe_unlink(self, path: Path) -> None:
-        try:
-            path.unlink(missing_ok=True)
-        except OSError:
-            pass
@@ -2,10 +2,17 @@
 
 from __future__ import annotations
 
+import hashlib
 import html
+import os
 import re
+import stat
+import threading
 import time
+from collections import OrderedDict
+from collections.abc import Iterator, Sequence
 from dataclasses import dataclass
+from operator import itemgetter
 from pathlib import Path
 
 from app.core.config import Settings, get_settings
@@ -32,15 +39,59 @@ from app.models.schemas import (
 from app.services.docling_service import DoclingAdapter
 from app.services.langextract_service import LangExtractAdapter
 
-PAN_PATTERN = re.compile(r"\b[A-Z]{5}[0-9]{4}[A-Z]\b")
+# Same matches as r"\b[A-Z]{5}[0-9]{4}[A-Z]\b", but leading with a character class lets
+# the regex engine skip to uppercase letters instead of testing \b at every offset.
+PAN_PATTERN = re.compile(r"[A-Z](?<!\w[A-Z])[A-Z]{4}[0-9]{4}[A-Z]\b")
 AADHAAR_PATTERN = re.compile(r"\b\d{4}\s?\d{4}\s?\d{4}\b")
 PASSPORT_PATTERN = re.compile(r"\b[A-PR-WYa-pr-wy][1-9]\d{6}\b")
-MRZ_PASSPORT_PATTERN = re.compile(r"^P<IND", re.MULTILINE)
+MRZ_PASSPORT_PREFIX = "P<IND"
 PIN_CODE_PATTERN = re.compile(r"\b\d{6}\b")
-MRZ_TD3_BLOCK_PATTERN = re.compile(r"(?P<line1>[A-Z0-9<]{44})\s+(?P<line2>[A-Z0-9<]{44})")
-MRZ_TD3_LINE2_PATTERN = re.compile(
-    r"(?P<line2>[A-Z0-9<]{9}[0-9<][A-Z]{3}[0-9]{6}[0-9<][MF<X][0-9]{6}[0-9<][A-Z0-9<]{14}[0-9<]{2})"
+_MRZ_TD3_LINE2 = r"[A-Z0-9<]{9}[0-9<][A-Z]{3}[0-9]{6}[0-9<][MF<X][0-9]{6}[0-9<][A-Z0-9<]{14}[0-9<]{2}"
+MRZ_TD3_BLOCK_PATTERN = re.compile(rf"(?P<line1>[A-Z0-9<]{{44}})\s+(?P<line2>{_MRZ_TD3_LINE2})")
+MRZ_TD3_LINE2_PATTERN = re.compile(rf"(?P<line2>{_MRZ_TD3_LINE2})")
+# Start of the first run of 44+ MRZ characters; every TD3 line lies in such a run.
+MRZ_RUN_START_PATTERN = re.compile(r"(?<![A-Z0-9<])[A-Z0-9<]{44}")
+PASSPORT_KEYWORDS = (
+    "passport",
+    "republic of india",
+    "nationality",
+    "date of issue",
+    "date of expiry",
+    "place of issue",
 )
+NON_ALNUM_PATTERN = re.compile(r"[^a-z0-9]+")
+
+# Field alias sets, written pre-normalized (see `_normalize_key`) so only span classes
+# need normalizing.
+_AADHAAR_ADDRESS_ALIASES = frozenset({"address", "residential_address"})
+_AADHAAR_NUMBER_ALIASES = frozenset({"aadhaar_number", "aadhaar", "uid", "id_number"})
+_ADDRESS_ALIASES = frozenset({"address"})
+_CARE_OF_ALIASES = frozenset({"care_of", "c_o", "co"})
+_DATE_OF_BIRTH_ALIASES = frozenset({"date_of_birth", "dob", "birth_date"})
+_DATE_OF_EXPIRY_ALIASES = frozenset({"date_of_expiry", "expiry_date"})
+_DATE_OF_ISSUE_ALIASES = frozenset({"date_of_issue", "issue_date"})
+_FATHER_NAME_ALIASES = frozenset({"father_name", "parent_name"})
+_FILE_NUMBER_ALIASES = frozenset({"file_number"})
+_FULL_NAME_ALIASES = frozenset({"full_name", "name"})
+_GIVEN_NAMES_ALIASES = frozenset({"given_names", "first_name", "name"})
+_ID_NUMBER_ALIASES = frozenset({"id_number", "document_number", "identifier"})
+_MRZ_LINE_1_ALIASES = frozenset({"mrz_line_1"})
+_MRZ_LINE_2_ALIASES = frozenset({"mrz_line_2"})
+_NATIONALITY_ALIASES = frozenset({"nationality"})
+_PAN_FULL_NAME_ALIASES = frozenset({"full_name", "name", "cardholder_name"})
+_PAN_NUMBER_ALIASES = frozenset({"pan_number", "pan", "id_number", "document_number"})
+_PASSPORT_NUMBER_ALIASES = frozenset({"passport_number", "passport_no", "id_number"})
+_PIN_CODE_ALIASES = frozenset({"pin_code", "postal_code"})
+_PLACE_OF_BIRTH_ALIASES = frozenset({"place_of_birth"})
+_PLACE_OF_ISSUE_ALIASES = frozenset({"place_of_issue"})
+_SEX_ALIASES = frozenset({"sex", "gender"})
+_SURNAME_ALIASES = frozenset({"surname", "last_name", "family_name"})
+_YEAR_OF_BIRTH_ALIASES = frozenset({"year_of_birth", "yob"})
+
+_SpanIndex = dict[str, tuple[int, ExtractionSpan]]
+_SpanCacheKey = tuple[bytes, DocumentType]
+# (mrz_line_1, mrz_line_2) of a TD3 passport, either possibly missing.
+_MrzLines = tuple[str | None, str | None]
 
 
 @dataclass
@@ -54,6 +105,24 @@ class _ExtractionResult:
     timings_ms: TimingsMs
 
 
+@dataclass
+class _PreparedDocument:
+    """A document through OCR and detection, waiting on the LangExtract stage."""
+
+    ocr_text: str
+    extraction_input: str
+    document_type_requested: DocumentType | None
+    target_type: DocumentType
+    id_match: re.Match[str] | None
+    # None when detection decided without scanning for the MRZ.
+    mrz_lines: _MrzLines | None
+    issues: list[Issue]
+    t_total_start: int
+    ocr_ms: int
+    detection_ms: int
+    t_detection_end: int
+
+
 class ExtractionService:
     """Orchestrates file validation, OCR, detection, and structured extraction."""
 
@@ -67,11 +136,16 @@ class ExtractionService:
         self.settings = settings or get_settings()
         self.docling_adapter = docling_adapter or DoclingAdapter()
         self.langextract_adapter = langextract_adapter or LangExtractAdapter(self.settings)
+        # Settings are fixed for the service's lifetime, so derive these once.
+        self._image_root_str = os.path.realpath(self.settings.image_directory)
+        self._preview_limit = max(self.settings.ocr_preview_chars, 0)
+        self._span_cache: OrderedDict[_SpanCacheKey, list[ExtractionSpan]] = OrderedDict()
+        self._span_cache_lock = threading.Lock()
 
     def process(self, request: ExtractionRequest) -> ExtractionResponse:
-        t0 = time.perf_counter()
+        t0 = time.perf_counter_ns()
         image_path = self._validate_and_resolve_path(request.filename)
-        validation_ms = _to_ms(t0)
+        validation_ms = _elapsed_ms(t0)
 
         result = self.process_from_path(
             image_path,
@@ -79,24 +153,69 @@ class ExtractionService:
             include_ocr_text=request.include_ocr_text,
             include_extractions=request.include_extractions,
         )
+        return _to_response(request.filename, result, validation_ms)
 
-        return ExtractionResponse(
-            filename=request.filename,
-            document_type_requested=result.document_type_requested,
-            document_type_detected=result.document_type_detected,
-            ocr=result.ocr,
-            fields=result.fields,
-            extractions=result.extractions,
-            issues=result.issues,
-            timings_ms=TimingsMs(
-                validation=validation_ms,
-                download=result.timings_ms.download,
-                ocr=result.timings_ms.ocr,
-                detection=result.timings_ms.detection,
-                extraction=result.timings_ms.extraction,
-                total=result.timings_ms.total,
-            ),
+    def process_stream(self, request: ExtractionRequest) -> Iterator[str | ExtractionResponse]:
+        """Run `process` one stage at a time: yield each stage name as it starts, then the response.
+
+        Lets the streaming route report progress while OCR and LangExtract run; the stages
+        themselves are the same as `process`.
+        """
+
+        t0 = time.perf_counter_ns()
+        image_path = self._validate_and_resolve_path(request.filename)
+        validation_ms = _elapsed_ms(t0)
+
+        yield "ocr"
+        t_total_start = time.perf_counter_ns()
+        ocr_text = self.extract_text(image_path)
+
+        yield "extract"
+        result = self.process_ocr_text(
+            ocr_text,
+            t_total_start=t_total_start,
+            document_type=request.document_type,
+            include_ocr_text=request.include_ocr_text,
+            include_extractions=request.include_extractions,
         )
+        yield _to_response(request.filename, result, validation_ms)
+
+    def process_batch(self, requests: Sequence[ExtractionRequest]) -> list[ExtractionResponse]:
+        """Process several v1 requests, sharing the LangExtract stage across all of them.
+
+        OCR and detection run per file; LangExtract then runs once for the whole batch (one
+        call per document type) instead of once per file. Each file's `extraction` timing is
+        the shared stage, and its `total` runs from its own OCR start to its response.
+        """
+
+        prepared: list[tuple[ExtractionRequest, int, _PreparedDocument]] = []
+        for request in requests:
+            t0 = time.perf_counter_ns()
+            image_path = self._validate_and_resolve_path(request.filename)
+            t_ocr_start = time.perf_counter_ns()
+            document = self._prepare(
+                self.extract_text(image_path),
+                t_total_start=t_ocr_start,
+                document_type=request.document_type,
+            )
+            prepared.append((request, _ns_to_ms(t_ocr_start - t0), document))
+
+        t_extraction_start = time.perf_counter_ns()
+        span_lists = self._extract_spans_batch(
+            [(document.extraction_input, document.target_type) for _, _, document in prepared]
+        )
+
+        responses: list[ExtractionResponse] = []
+        for (request, validation_ms, document), spans in zip(prepared, span_lists):
+            result = self._finish(
+                document,
+                spans,
+                t_extraction_start=t_extraction_start,
+                include_ocr_text=request.include_ocr_text,
+                include_extractions=request.include_extractions,
+            )
+            responses.append(_to_response(request.filename, result, validation_ms))
+        return responses
 
     def process_from_path(
         self,
@@ -106,16 +225,81 @@ class ExtractionService:
         include_ocr_text: bool = True,
         include_extractions: bool = True,
     ) -> _ExtractionResult:
-        t_total_start = time.perf_counter()
+        t_total_start = time.perf_counter_ns()
+        ocr_text = self.extract_text(path)
+        return self.process_ocr_text(
+            ocr_text,
+            t_total_start=t_total_start,
+            document_type=document_type,
+            include_ocr_text=include_ocr_text,
+            include_extractions=include_extractions,
+        )
 
-        t0 = time.perf_counter()
-        ocr_text = self.docling_adapter.extract_text(path).strip()
+    def process_from_bytes(
+        self,
+        data: bytes,
+        filename: str,
+        *,
+        document_type: DocumentType | None = None,
+        include_ocr_text: bool = True,
+        include_extractions: bool = True,
+    ) -> _ExtractionResult:
+        t_total_start = time.perf_counter_ns()
+        ocr_text = self.extract_text_from_bytes(data, filename)
+        return self.process_ocr_text(
+            ocr_text,
+            t_total_start=t_total_start,
+            document_type=document_type,
+            include_ocr_text=include_ocr_text,
+            include_extractions=include_extractions,
+        )
+
+    def extract_text(self, path: Path) -> str:
+        """Run the OCR stage only; pair with `process_ocr_text` to split the pipeline."""
+
+        return self.docling_adapter.extract_text(path)
+
+    def extract_text_from_bytes(self, data: bytes, filename: str) -> str:
+        return self.docling_adapter.extract_text_from_bytes(data, filename)
+
+    def process_ocr_text(
+        self,
+        ocr_text: str,
+        *,
+        t_total_start: int,
+        document_type: DocumentType | None,
+        include_ocr_text: bool,
+        include_extractions: bool,
+    ) -> _ExtractionResult:
+        document = self._prepare(ocr_text, t_total_start=t_total_start, document_type=document_type)
+        # Stages stay sequential on purpose: each needs the previous stage's output, and
+        # detection is microseconds next to the LLM call, so speculatively extracting for
+        # several candidate types would multiply LLM cost without shortening the request.
+        spans = self._extract_spans(document.extraction_input, document.target_type)
+        return self._finish(
+            document,
+            spans,
+            t_extraction_start=document.t_detection_end,
+            include_ocr_text=include_ocr_text,
+            include_extractions=include_extractions,
+        )
+
+    def _prepare(
+        self,
+        ocr_text: str,
+        *,
+        t_total_start: int,
+        document_type: DocumentType | None,
+    ) -> _PreparedDocument:
+        """Validate OCR output and settle the document type ahead of the LLM stage."""
+
+        ocr_text = ocr_text.strip()
         if not ocr_text:
             raise EmptyOCRTextError("OCR output is empty for the provided image")
-        ocr_ms = _to_ms(t0)
+        # One clock read per stage boundary: each read ends one stage and starts the next.
+        t_ocr_end = time.perf_counter_ns()
 
-        t0 = time.perf_counter()
-        detected_type = self.detect_document_type(ocr_text)
+        detected_type, id_match, mrz_lines = self._detect_document_type(ocr_text)
         issues: list[Issue] = []
 
         target_type = detected_type
@@ -144,18 +328,55 @@ class ExtractionService:
                     )
                 )
 
-        detection_ms = _to_ms(t0)
+        # Only a prefix goes to LangExtract, so span offsets stay valid against the full text.
+        extraction_input = ocr_text
+        input_limit = self.settings.extraction_max_input_chars
+        if 0 < input_limit < len(ocr_text):
+            extraction_input = ocr_text[:input_limit]
+            issues.append(
+                Issue(
+                    code="OCR_TEXT_TRUNCATED",
+                    message=(
+                        f"OCR text has {len(ocr_text)} characters; only the first "
+                        f"{input_limit} were sent for extraction."
+                    ),
+                    severity="warning",
+                )
+            )
 
-        t0 = time.perf_counter()
-        spans = self.langextract_adapter.extract(ocr_text=ocr_text, document_type=target_type)
-        fields = self._map_fields(target_type, spans, ocr_text)
-        extraction_ms = _to_ms(t0)
+        t_detection_end = time.perf_counter_ns()
+        return _PreparedDocument(
+            ocr_text=ocr_text,
+            extraction_input=extraction_input,
+            document_type_requested=document_type,
+            target_type=target_type,
+            id_match=id_match,
+            mrz_lines=mrz_lines,
+            issues=issues,
+            t_total_start=t_total_start,
+            ocr_ms=_ns_to_ms(t_ocr_end - t_total_start),
+            detection_ms=_ns_to_ms(t_detection_end - t_ocr_end),
+            t_detection_end=t_detection_end,
+        )
 
-        total_ms = _to_ms(t_total_start)
+    def _finish(
+        self,
+        document: _PreparedDocument,
+        spans: list[ExtractionSpan],
+        *,
+        t_extraction_start: int,
+        include_ocr_text: bool,
+        include_extractions: bool,
+    ) -> _ExtractionResult:
+        ocr_text = document.ocr_text
+        fields = self._map_fields(
+            document.target_type, spans, ocr_text, document.id_match, document.mrz_lines
+        )
+        t_end = time.perf_counter_ns()
 
         return _ExtractionResult(
-            document_type_requested=document_type,
-            document_type_detected=target_type,
+            document_type_requested=document.document_type_requested,
+            document_type_detected=document.target_type,
             ocr=OcrPayload(
                 text=ocr_text if include_ocr_text else None,
                 text_preview=self._text_preview(ocr_text),
@@ -163,134 +384,227 @@ class ExtractionService:
             ),
             fields=fields,
             extractions=spans if include_extractions else None,
-            issues=issues,
+            issues=document.issues,
             timings_ms=TimingsMs(
                 validation=None,
                 download=None,
-                ocr=ocr_ms,
-                detection=detection_ms,
-                extraction=extraction_ms,
-                total=total_ms,
+                ocr=document.ocr_ms,
+                detection=document.detection_ms,
+                extraction=_ns_to_ms(t_end - t_extraction_start),
+                total=_ns_to_ms(t_end - document.t_total_start),
             ),
         )
 
+    def _extract_spans(self, ocr_text: str, document_type: DocumentType) -> list[ExtractionSpan]:
+        """Run LangExtract, reusing spans for OCR text already extracted as this type.
+
+        Retries and webhook redeliveries resubmit the same document; keying on a digest of
+        the OCR text lets them skip the LLM call without keeping old texts alive.
+        """
+
+        if self.settings.extraction_cache_size <= 0:
+            return self.langextract_adapter.extract(ocr_text=ocr_text, document_type=document_type)
+
+        key = _span_cache_key(ocr_text, document_type)
+        cached = self._cached_spans(key)
+        if cached is not None:
+            return cached
+
+        spans = self.langextract_adapter.extract(ocr_text=ocr_text, document_type=document_type)
+        self._store_spans(key, spans)
+        return spans
+
+    def _extract_spans_batch(
+        self, items: list[tuple[str, DocumentType]]
+    ) -> list[list[ExtractionSpan]]:
+        """Batch counterpart of `_extract_spans`: only cache misses go to LangExtract."""
+
+        if self.settings.extraction_cache_size <= 0:
+            return self.langextract_adapter.extract_batch(items)
+
+        keys = [_span_cache_key(ocr_text, document_type) for ocr_text, document_type in items]
+        results = [self._cached_spans(key) for key in keys]
+        misses = [index for index, spans in enumerate(results) if spans is None]
+        if misses:
+            fetched = self.langextract_adapter.extract_batch([items[index] for index in misses])
+            for index, spans in zip(misses, fetched):
+                self._store_spans(keys[index], spans)
+                results[index] = spans
+        return results
+
+    def _cached_spans(self, key: _SpanCacheKey) -> list[ExtractionSpan] | None:
+        with self._span_cache_lock:
+            cached = self._span_cache.get(key)
+            if cached is None:
+                return None
+            self._span_cache.move_to_end(key)
+            return list(cached)
+
+    def _store_spans(self, key: _SpanCacheKey, spans: list[ExtractionSpan]) -> None:
+        with self._span_cache_lock:
+            self._span_cache[key] = list(spans)
+            self._span_cache.move_to_end(key)
+            while len(self._span_cache) > self.settings.extraction_cache_size:
+                self._span_cache.popitem(last=False)
+
     def detect_document_type(self, ocr_text: str) -> DocumentType:
-        if PAN_PATTERN.search(ocr_text):
-            return DocumentType.PAN
+        return self._detect_document_type(ocr_text)[0]
+
+    def _detect_document_type(
+        self, ocr_text: str
+    ) -> tuple[DocumentType, re.Match[str] | None, _MrzLines | None]:
+        """Detect the type, also returning the ID-number match that decided it, if any.
 
-        if AADHAAR_PATTERN.search(ocr_text):
-            return DocumentType.AADHAAR
+        The MRZ lines come back too when detection had to scan for them, so passport field
+        mapping can reuse them instead of scanning the text again.
+        """
 
-        passport_score = 0
+        match = PAN_PATTERN.search(ocr_text)
+        if match:
+            return DocumentType.PAN, match, None
+
+        match = AADHAAR_PATTERN.search(ocr_text)
+        if match:
+            return DocumentType.AADHAAR, match, None
+
+        # A passport needs a score of 2: any one strong signal, or two keywords.
+        # Checks run cheapest first so the MRZ block scan only runs when still undecided.
+        if _has_mrz_passport_line(ocr_text):
+            return DocumentType.PASSPORT, None, None
+
+        match = PASSPORT_PATTERN.search(ocr_text)
+        if match:
+            return DocumentType.PASSPORT, match, None
+
+        # Stop at the second hit: on a passport page both are usually found within the first
+        # couple of keywords, and every further miss is a full scan of the text.
         lower = ocr_text.lower()
-        if PASSPORT_PATTERN.search(ocr_text):
-            passport_score += 2
-        if MRZ_PASSPORT_PATTERN.search(ocr_text):
-            passport_score += 2
-        if _extract_mrz_td3_lines(ocr_text)[1] is not None:
-            passport_score += 2
-
-        passport_keywords = (
-            "passport",
-            "republic of india",
-            "nationality",
-            "date of issue",
-            "date of expiry",
-            "place of issue",
-        )
-        passport_score += sum(1 for keyword in passport_keywords if keyword in lower)
+        hits = 0
+        for keyword in PASSPORT_KEYWORDS:
+            if keyword in lower:
+                hits += 1
+                if hits == 2:
+                    return DocumentType.PASSPORT, None, None
 
-        if passport_score >= 2:
-            return DocumentType.PASSPORT
+        mrz_lines = _extract_mrz_td3_lines(ocr_text)
+        if mrz_lines[1] is not None:
+            return DocumentType.PASSPORT, None, mrz_lines
 
-        return DocumentType.OTHER
+        return DocumentType.OTHER, None, mrz_lines
 
     def _validate_and_resolve_path(self, filename: str) -> Path:
-        if Path(filename).name != filename or "/" in filename or "\\" in filename:
+        # Any "/" makes `.name` differ from the input, so only backslashes need a separate check.
+        name_path = Path(filename)
+        if name_path.name != filename or "\\" in filename:
             raise PathTraversalError("Filename must be a basename without directories")
 
-        extension = Path(filename).suffix.lower()
-        if extension not in self.settings.allowed_extensions:
+        extension = name_path.suffix.lower()
+        if extension not in self.settings.allowed_extension_set:
             allowed = ", ".join(self.settings.allowed_extensions)
             raise InvalidFileExtensionError(
                 f"Unsupported extension '{extension}'. Allowed extensions: {allowed}"
             )
 
-        image_root = self.settings.image_directory.resolve()
-        candidate = (image_root / filename).resolve()
+        # String-level realpath/commonpath avoid building Path objects and walking `.parents`.
+        image_root = self._image_root_str
+        candidate = os.path.realpath(os.path.join(image_root, filename))
 
-        if image_root != candidate and image_root not in candidate.parents:
+        if os.path.commonpath((image_root, candidate)) != image_root:
             raise PathTraversalError("Resolved file path escapes configured image directory")
 
-        if not candidate.exists() or not candidate.is_file():
+        # One stat() instead of exists() + is_file().
+        try:
+            is_regular_file = stat.S_ISREG(os.stat(candidate).st_mode)
+        except OSError:
+            is_regular_file = False
+        if not is_regular_file:
             raise SourceFileNotFoundError(f"Source file not found: {filename}")
 
-        return candidate
+        return Path(candidate)
 
     def _map_fields(
         self,
         document_type: DocumentType,
         spans: list[ExtractionSpan],
         ocr_text: str,
+        id_match: re.Match[str] | None = None,
+        mrz_lines: _MrzLines | None = None,
     ) -> PanFields | AadhaarFields | PassportFields | OtherFields:
+        span_index = _build_span_index(spans)
         if document_type == DocumentType.PAN:
-            return self._map_pan_fields(spans, ocr_text)
+            return self._map_pan_fields(span_index, ocr_text, id_match)
 
         if document_type == DocumentType.AADHAAR:
-            return self._map_aadhaar_fields(spans, ocr_text)
+            return self._map_aadhaar_fields(span_index, ocr_text, id_match)
 
         if document_type == DocumentType.PASSPORT:
-            return self._map_passport_fields(spans, ocr_text)
+            return self._map_passport_fields(span_index, ocr_text, id_match, mrz_lines)
 
-        return self._map_other_fields(spans, ocr_text)
+        return self._map_other_fields(span_index, ocr_text)
 
-    def _map_pan_fields(self, spans: list[ExtractionSpan], ocr_text: str) -> PanFields:
-        pan_number = self._pick_field(spans, ocr_text, ["pan_number", "pan", "id_number", "document_number"])
+    def _map_pan_fields(
+        self,
+        span_index: _SpanIndex,
+        ocr_text: str,
+        id_match: re.Match[str] | None,
+    ) -> PanFields:
+        pan_number = self._pick_field(span_index, ocr_text, _PAN_NUMBER_ALIASES)
         if pan_number is None:
-            pan_number = self._regex_evidence(PAN_PATTERN, ocr_text)
+            pan_number = self._regex_evidence(PAN_PATTERN, ocr_text, id_match)
 
         return PanFields(
             pan_number=pan_number,
-            full_name=self._pick_field(spans, ocr_text, ["full_name", "name", "cardholder_name"]),
-            father_name=self._pick_field(spans, ocr_text, ["father_name", "parent_name"]),
-            date_of_birth=self._pick_field(spans, ocr_text, ["date_of_birth", "dob", "birth_date"]),
+            full_name=self._pick_field(span_index, ocr_text, _PAN_FULL_NAME_ALIASES),
+            father_name=self._pick_field(span_index, ocr_text, _FATHER_NAME_ALIASES),
+            date_of_birth=self._pick_field(span_index, ocr_text, _DATE_OF_BIRTH_ALIASES),
         )
 
-    def _map_aadhaar_fields(self, spans: list[ExtractionSpan], ocr_text: str) -> AadhaarFields:
-        aadhaar_number = self._pick_field(spans, ocr_text, ["aadhaar_number", "aadhaar", "uid", "id_number"])
+    def _map_aadhaar_fields(
+        self,
+        span_index: _SpanIndex,
+        ocr_text: str,
+        id_match: re.Match[str] | None,
+    ) -> AadhaarFields:
+        aadhaar_number = self._pick_field(span_index, ocr_text, _AADHAAR_NUMBER_ALIASES)
         if aadhaar_number is None:
-            aadhaar_number = self._regex_evidence(AADHAAR_PATTERN, ocr_text)
+            aadhaar_number = self._regex_evidence(AADHAAR_PATTERN, ocr_text, id_match)
 
         return AadhaarFields(
             aadhaar_number=aadhaar_number,
-            full_name=self._pick_field(spans, ocr_text, ["full_name", "name"]),
-            date_of_birth=self._pick_field(spans, ocr_text, ["date_of_birth", "dob", "birth_date"]),
-            year_of_birth=self._pick_field(spans, ocr_text, ["year_of_birth", "yob"]),
-            gender=self._pick_field(spans, ocr_text, ["gender", "sex"]),
-            address=self._pick_field(spans, ocr_text, ["address", "residential_address"]),
-            care_of=self._pick_field(spans, ocr_text, ["care_of", "c_o", "co"]),
-            pin_code=self._pick_field(spans, ocr_text, ["pin_code", "postal_code"]) or self._regex_evidence(PIN_CODE_PATTERN, ocr_text),
+            full_name=self._pick_field(span_index, ocr_text, _FULL_NAME_ALIASES),
+            date_of_birth=self._pick_field(span_index, ocr_text, _DATE_OF_BIRTH_ALIASES),
+            year_of_birth=self._pick_field(span_index, ocr_text, _YEAR_OF_BIRTH_ALIASES),
+            gender=self._pick_field(span_index, ocr_text, _SEX_ALIASES),
+            address=self._pick_field(span_index, ocr_text, _AADHAAR_ADDRESS_ALIASES),
+            care_of=self._pick_field(span_index, ocr_text, _CARE_OF_ALIASES),
+            pin_code=self._pick_field(span_index, ocr_text, _PIN_CODE_ALIASES) or self._regex_evidence(PIN_CODE_PATTERN, ocr_text),
         )
 
-    def _map_passport_fields(self, spans: list[ExtractionSpan], ocr_text: str) -> PassportFields:
-        passport_number = self._pick_field(spans, ocr_text, ["passport_number", "passport_no", "id_number"])
+    def _map_passport_fields(
+        self,
+        span_index: _SpanIndex,
+        ocr_text: str,
+        id_match: re.Match[str] | None,
+        mrz_lines: _MrzLines | None,
+    ) -> PassportFields:
+        passport_number = self._pick_field(span_index, ocr_text, _PASSPORT_NUMBER_ALIASES)
         if passport_number is None:
-            passport_number = self._regex_evidence(PASSPORT_PATTERN, ocr_text)
+            passport_number = self._regex_evidence(PASSPORT_PATTERN, ocr_text, id_match)
 
         fields = PassportFields(
             passport_number=passport_number,
-            surname=self._pick_field(spans, ocr_text, ["surname", "last_name", "family_name"]),
-            given_names=self._pick_field(spans, ocr_text, ["given_names", "first_name", "name"]),
-            nationality=self._pick_field(spans, ocr_text, ["nationality"]),
-            date_of_birth=self._pick_field(spans, ocr_text, ["date_of_birth", "dob", "birth_date"]),
-            sex=self._pick_field(spans, ocr_text, ["sex", "gender"]),
-            place_of_birth=self._pick_field(spans, ocr_text, ["place_of_birth"]),
-            place_of_issue=self._pick_field(spans, ocr_text, ["place_of_issue"]),
-            date_of_issue=self._pick_field(spans, ocr_text, ["date_of_issue", "issue_date"]),
-            date_of_expiry=self._pick_field(spans, ocr_text, ["date_of_expiry", "expiry_date"]),
-            file_number=self._pick_field(spans, ocr_text, ["file_number"]),
-            mrz_line_1=self._pick_field(spans, ocr_text, ["mrz_line_1"]),
-            mrz_line_2=self._pick_field(spans, ocr_text, ["mrz_line_2"]),
+            surname=self._pick_field(span_index, ocr_text, _SURNAME_ALIASES),
+            given_names=self._pick_field(span_index, ocr_text, _GIVEN_NAMES_ALIASES),
+            nationality=self._pick_field(span_index, ocr_text, _NATIONALITY_ALIASES),
+            date_of_birth=self._pick_field(span_index, ocr_text, _DATE_OF_BIRTH_ALIASES),
+            sex=self._pick_field(span_index, ocr_text, _SEX_ALIASES),
+            place_of_birth=self._pick_field(span_index, ocr_text, _PLACE_OF_BIRTH_ALIASES),
+            place_of_issue=self._pick_field(span_index, ocr_text, _PLACE_OF_ISSUE_ALIASES),
+            date_of_issue=self._pick_field(span_index, ocr_text, _DATE_OF_ISSUE_ALIASES),
+            date_of_expiry=self._pick_field(span_index, ocr_text, _DATE_OF_EXPIRY_ALIASES),
+            file_number=self._pick_field(span_index, ocr_text, _FILE_NUMBER_ALIASES),
+            mrz_line_1=self._pick_field(span_index, ocr_text, _MRZ_LINE_1_ALIASES),
+            mrz_line_2=self._pick_field(span_index, ocr_text, _MRZ_LINE_2_ALIASES),
         )
 
         if (
@@ -299,7 +613,9 @@ class ExtractionService:
             or fields.mrz_line_1 is None
             or fields.mrz_line_2 is None
         ):
-            mrz_line_1, mrz_line_2 = _extract_mrz_td3_lines(ocr_text)
+            if mrz_lines is None:
+                mrz_lines = _extract_mrz_td3_lines(ocr_text)
+            mrz_line_1, mrz_line_2 = mrz_lines
             if mrz_line_1 is not None and fields.mrz_line_1 is None:
                 fields.mrz_line_1 = FieldEvidence(
                     value=mrz_line_1,
@@ -334,33 +650,28 @@ class ExtractionService:
 
         return fields
 
-    def _map_other_fields(self, spans: list[ExtractionSpan], ocr_text: str) -> OtherFields:
-        id_number = self._pick_field(spans, ocr_text, ["id_number", "document_number", "identifier"])
-        if id_number is None:
-            id_number = (
-                self._regex_evidence(PAN_PATTERN, ocr_text)
-                or self._regex_evidence(AADHAAR_PATTERN, ocr_text)
-                or self._regex_evidence(PASSPORT_PATTERN, ocr_text)
-            )
-
+    def _map_other_fields(self, span_index: _SpanIndex, ocr_text: str) -> OtherFields:
+        # No regex fallback: documents only map as OTHER when detection found no PAN, Aadhaar
+        # or passport number, so rescanning the text for those patterns can never match.
         return OtherFields(
-            id_number=id_number,
-            full_name=self._pick_field(spans, ocr_text, ["full_name", "name"]),
-            date_of_birth=self._pick_field(spans, ocr_text, ["date_of_birth", "dob", "birth_date"]),
-            address=self._pick_field(spans, ocr_text, ["address"]),
+            id_number=self._pick_field(span_index, ocr_text, _ID_NUMBER_ALIASES),
+            full_name=self._pick_field(span_index, ocr_text, _FULL_NAME_ALIASES),
+            date_of_birth=self._pick_field(span_index, ocr_text, _DATE_OF_BIRTH_ALIASES),
+            address=self._pick_field(span_index, ocr_text, _ADDRESS_ALIASES),
         )
 
     def _pick_field(
         self,
-        spans: list[ExtractionSpan],
+        span_index: _SpanIndex,
         ocr_text: str,
-        aliases: list[str],
+        aliases: frozenset[str],
     ) -> FieldEvidence | None:
-        normalized_aliases = {_normalize_key(alias) for alias in aliases}
-        for span in spans:
-            if _normalize_key(span.extraction_class) in normalized_aliases:
-                return self._build_evidence(span, ocr_text)
-        return None
+        # The earliest span matching any alias wins, as when scanning spans in order.
+        candidates = [span_index[alias] for alias in aliases if alias in span_index]
+        if not candidates:
+            return None
+        _, span = min(candidates, key=itemgetter(0))
+        return self._build_evidence(span, ocr_text)
 
     def _build_evidence(self, span: ExtractionSpan, ocr_text: str) -> FieldEvidence:
         evidence = span.extraction_text
@@ -376,8 +687,16 @@ class ExtractionService:
             source_extraction_class=span.extraction_class,
         )
 
-    def _regex_evidence(self, pattern: re.Pattern[str], ocr_text: str) -> FieldEvidence | None:
-        match = pattern.search(ocr_text)
+    def _regex_evidence(
+        self,
+        pattern: re.Pattern[str],
+        ocr_text: str,
+        known_match: re.Match[str] | None = None,
+    ) -> FieldEvidence | None:
+        # Reuse the match detection already found for this pattern instead of rescanning.
+        match = known_match if known_match is not None and known_match.re is pattern else None
+        if match is None:
+            match = pattern.search(ocr_text)
         if not match:
             return None
 
@@ -390,33 +709,92 @@ class ExtractionService:
         )
 
     def _text_preview(self, text: str) -> str:
-        preview_limit = max(self.settings.ocr_preview_chars, 0)
-        if len(text) <= preview_limit:
+        if len(text) <= self._preview_limit:
             return text
-        return f"{text[:preview_limit]}..."
+        return text[: self._preview_limit] + "..."
+
+
+def _to_response(filename: str, result: _ExtractionResult, validation_ms: int) -> ExtractionResponse:
+    return ExtractionResponse.model_construct(
+        filename=filename,
+        document_type_requested=result.document_type_requested,
+        document_type_detected=result.document_type_detected,
+        ocr=result.ocr,
+        fields=result.fields,
+        extractions=result.extractions,
+        issues=result.issues,
+        timings_ms=TimingsMs.model_construct(
+            validation=validation_ms,
+            download=result.timings_ms.download,
+            ocr=result.timings_ms.ocr,
+            detection=result.timings_ms.detection,
+            extraction=result.timings_ms.extraction,
+            total=result.timings_ms.total,
+        ),
+    )
+
+
+def _span_cache_key(ocr_text: str, document_type: DocumentType) -> _SpanCacheKey:
+    return hashlib.blake2b(ocr_text.encode(), digest_size=16).digest(), document_type
 
 
-def _to_ms(start_time: float) -> int:
-    return int(round((time.perf_counter() - start_time) * 1000))
+def _elapsed_ms(start_ns: int) -> int:
+    return _ns_to_ms(time.perf_counter_ns() - start_ns)
+
+
+def _ns_to_ms(duration_ns: int) -> int:
+    return duration_ns // 1_000_000
+
+
+def _build_span_index(spans: list[ExtractionSpan]) -> _SpanIndex:
+    """Map each normalized extraction class to its first span and that span's position."""
+
+    span_index: _SpanIndex = {}
+    for position, span in enumerate(spans):
+        span_index.setdefault(_normalize_key(span.extraction_class), (position, span))
+    return span_index
 
 
 def _normalize_key(value: str) -> str:
-    return re.sub(r"[^a-z0-9]+", "_", value.lower()).strip("_")
+    return NON_ALNUM_PATTERN.sub("_", value.lower()).strip("_")
+
 
+def _has_mrz_passport_line(ocr_text: str) -> bool:
+    """True if a line starts with the Indian passport MRZ header.
 
-def _extract_mrz_td3_lines(ocr_text: str) -> tuple[str | None, str | None]:
+    Equivalent to `re.search(r"^P<IND", text, re.MULTILINE)`, but `str.find` skips
+    straight to candidates instead of trying the anchor at every position.
+    """
+
+    index = ocr_text.find(MRZ_PASSPORT_PREFIX)
+    while index != -1:
+        if index == 0 or ocr_text[index - 1] == "\n":
+            return True
+        index = ocr_text.find(MRZ_PASSPORT_PREFIX, index + 1)
+    return False
+
+
+def _extract_mrz_td3_lines(ocr_text: str) -> _MrzLines:
     """Return (mrz_line_1, mrz_line_2) for TD3 passports if present in OCR text.
 
     Docling exports Markdown-ish text and may HTML-escape `<` as `&lt;`, so unescape first.
+    The 44-char MRZ scans dominate detection time on long documents, so a request runs this
+    at most once: detection hands its result on to passport field mapping.
     """
 
     normalized = html.unescape(ocr_text).upper()
-    for match in MRZ_TD3_BLOCK_PATTERN.finditer(normalized):
-        line2 = match.group("line2")
-        if MRZ_TD3_LINE2_PATTERN.fullmatch(line2):
-            return match.group("line1"), line2
+    # The run-start scan only tests offsets that begin a run, so it is cheaper than the TD3
+    # patterns; text without a long enough run (most non-passport OCR) skips them entirely,
+    # and otherwise both searches start at the first candidate instead of offset 0.
+    run = MRZ_RUN_START_PATTERN.search(normalized)
+    if run is None:
+        return None, None
+
+    match = MRZ_TD3_BLOCK_PATTERN.search(normalized, run.start())
+    if match:
+        return match.group("line1"), match.group("line2")
 
-    match = MRZ_TD3_LINE2_PATTERN.search(normalized)
+    match = MRZ_TD3_LINE2_PATTERN.search(normalized, run.start())
     if match:
         return None, match.group("line2")
 
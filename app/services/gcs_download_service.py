@@ -3,13 +3,19 @@
 from __future__ import annotations
 
 import base64
+import io
 import json
+import os
 import tempfile
+from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO
 
 from app.core.config import Settings, get_settings
 from app.core.errors import GCSDownloadError
+from app.services.temp_files import TEMP_FILE_PREFIX, remove_temp_file
+
+GCS_HTTP_POOL_SIZE = 32
 
 
 class GCSDownloader:
@@ -35,37 +41,69 @@ class GCSDownloader:
             raise GCSDownloadError("GCS object key is required")
 
         suffix = self._resolve_suffix(blob_name)
-        blob = self._resolve_blob(bucket_name, blob_name)
-        blob_size = blob.size
-        if blob_size is None:
-            raise GCSDownloadError(f"Unable to determine size for gs://{bucket_name}/{blob_name}")
-        if blob_size > self.max_download_bytes:
-            raise GCSDownloadError(
-                f"GCS object exceeds limit of {self.max_download_bytes} bytes"
-            )
-
-        temp_file = tempfile.NamedTemporaryFile(mode="wb", delete=False, suffix=suffix)
-        temp_path = Path(temp_file.name)
-        temp_file.close()
+        blob = self._get_blob(bucket_name, blob_name)
+
+        # mkstemp + fdopen: a plain file object, without NamedTemporaryFile's wrapper.
+        fd, temp_name = tempfile.mkstemp(
+            prefix=TEMP_FILE_PREFIX, suffix=suffix, dir=self.settings.temp_dir
+        )
+        temp_path = Path(temp_name)
 
         try:
-            blob.download_to_filename(str(temp_path))
-            return temp_path
+            with os.fdopen(fd, "wb") as temp_file:
+                self._download_capped(blob, temp_file)
+        except _DownloadTooLarge:
+            remove_temp_file(temp_path)
+            raise self._oversized_error() from None
         except Exception as exc:
-            self._safe_unlink(temp_path)
+            remove_temp_file(temp_path)
             raise GCSDownloadError(f"Failed to download gs://{bucket_name}/{blob_name}: {exc}") from exc
+        return temp_path
 
-    def _resolve_blob(self, bucket_name: str, blob_name: str) -> Any:
-        client = self._get_client()
-        bucket = client.bucket(bucket_name)
-        blob = bucket.blob(blob_name)
+    def download_to_memory(self, bucket: str, object_key: str) -> tuple[bytes, str]:
+        """Download into memory, skipping the temp file; returns (content, filename)."""
+
+        bucket_name = bucket.strip()
+        blob_name = object_key.strip()
+        if not bucket_name:
+            raise GCSDownloadError("GCS bucket is required")
+        if not blob_name:
+            raise GCSDownloadError("GCS object key is required")
 
+        self._resolve_suffix(blob_name)
+        blob = self._get_blob(bucket_name, blob_name)
+
+        buffer = io.BytesIO()
         try:
-            blob.reload(client=client)
+            self._download_capped(blob, buffer)
+        except _DownloadTooLarge:
+            raise self._oversized_error() from None
         except Exception as exc:
-            raise GCSDownloadError(f"Unable to read GCS object metadata: {exc}") from exc
+            raise GCSDownloadError(f"Failed to download gs://{bucket_name}/{blob_name}: {exc}") from exc
+        return buffer.getvalue(), Path(blob_name).name
+
+    def warm_up(self) -> None:
+        """Import the GCS libraries and build the client now, ahead of the first download."""
+
+        self._get_client()
+
+    def _get_blob(self, bucket_name: str, blob_name: str) -> Any:
+        # No metadata reload: the size limit is enforced while the body streams in.
+        return self._get_client().bucket(bucket_name).blob(blob_name)
 
-        return blob
+    def _download_capped(self, blob: Any, file_obj: BinaryIO) -> None:
+        """Stream `blob` into `file_obj`, raising `_DownloadTooLarge` past the size limit.
+
+        The Range header (bytes 0..max_download_bytes, end inclusive) keeps GCS from sending
+        much more than the limit, but GCS ignores it when it decompresses a gzip-encoded
+        object on the fly, so the limit itself is enforced by counting written bytes.
+        """
+
+        writer = _CappedWriter(file_obj, self.max_download_bytes)
+        blob.download_to_file(writer, start=0, end=self.max_download_bytes)
+
+    def _oversized_error(self) -> GCSDownloadError:
+        return GCSDownloadError(f"GCS object exceeds limit of {self.max_download_bytes} bytes")
 
     def _get_client(self) -> Any:
         if self._gcs_client is not None:
@@ -75,40 +113,12 @@ class GCSDownloader:
         if not encoded_credentials:
             raise GCSDownloadError("GCS credentials are not configured")
 
-        try:
-            from google.cloud import storage
-            from google.oauth2 import service_account
-        except Exception as exc:
-            raise GCSDownloadError(f"Unable to import GCS client libraries: {exc}") from exc
-
-        try:
-            credentials_info = self._decode_credentials_info(encoded_credentials)
-            credentials = service_account.Credentials.from_service_account_info(credentials_info)
-            self._gcs_client = storage.Client(
-                project=credentials.project_id or credentials_info.get("project_id"),
-                credentials=credentials,
-            )
-            return self._gcs_client
-        except Exception as exc:
-            raise GCSDownloadError(f"Unable to initialize GCS client: {exc}") from exc
-
-    def _decode_credentials_info(self, encoded_credentials: str) -> dict[str, Any]:
-        try:
-            payload = encoded_credentials.strip()
-            padding = "=" * (-len(payload) % 4)
-            decoded_bytes = base64.b64decode(payload + padding)
-            parsed = json.loads(decoded_bytes.decode("utf-8"))
-        except Exception as exc:
-            raise GCSDownloadError("GCS credentials must be valid base64-encoded JSON") from exc
-
-        if not isinstance(parsed, dict):
-            raise GCSDownloadError("GCS credentials JSON must be an object")
-
-        return parsed
+        self._gcs_client = _build_client(encoded_credentials)
+        return self._gcs_client
 
     def _resolve_suffix(self, object_key: str) -> str:
         suffix = Path(object_key).suffix.lower()
-        if suffix in self.settings.allowed_extensions:
+        if suffix in self.settings.allowed_extension_set:
             return suffix
 
         allowed = ", ".join(self.settings.allowed_extensions)
@@ -116,8 +126,79 @@ class GCSDownloader:
             f"Unsupported extension '{suffix}'. Allowed extensions: {allowed}"
         )
 
-    def _safe_unlink(self, path: Path) -> None:
-        try:
-            path.unlink(missing_ok=True)
-        except OSError:
-            pass
+
+class _DownloadTooLarge(Exception):
+    pass
+
+
+class _CappedWriter:
+    """Write-through file wrapper that raises `_DownloadTooLarge` once `limit` is exceeded."""
+
+    def __init__(self, file_obj: BinaryIO, limit: int) -> None:
+        self._file = file_obj
+        self._limit = limit
+        self._written = 0
+
+    def write(self, data: bytes) -> int:
+        self._written += len(data)
+        if self._written > self._limit:
+            raise _DownloadTooLarge
+        return self._file.write(data)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._file, name)
+
+
+@lru_cache(maxsize=4)
+def _build_client(encoded_credentials: str) -> Any:
+    """Return a storage client per credential set, shared by every downloader in the process.
+
+    The client's session gets a connection pool sized for concurrent downloads (requests
+    defaults to 10), so threadpool downloads reuse TCP/TLS connections instead of
+    reconnecting once the pool is exhausted. Passing our own session skips the client's
+    scoping of the credentials, so the session is built from scoped credentials here.
+    """
+
+    try:
+        from google.auth.transport.requests import AuthorizedSession
+        from google.cloud import storage
+        from google.oauth2 import service_account
+        from requests.adapters import HTTPAdapter
+    except Exception as exc:
+        raise GCSDownloadError(f"Unable to import GCS client libraries: {exc}") from exc
+
+    credentials_info = _decode_credentials_info(encoded_credentials)
+    try:
+        credentials = service_account.Credentials.from_service_account_info(credentials_info)
+        session = AuthorizedSession(credentials.with_scopes(storage.Client.SCOPE))
+        adapter = HTTPAdapter(pool_connections=GCS_HTTP_POOL_SIZE, pool_maxsize=GCS_HTTP_POOL_SIZE)
+        session.mount("https://", adapter)
+        return storage.Client(
+            project=credentials.project_id or credentials_info.get("project_id"),
+            credentials=credentials,
+            _http=session,
+        )
+    except Exception as exc:
+        raise GCSDownloadError(f"Unable to initialize GCS client: {exc}") from exc
+
+
+@lru_cache(maxsize=4)
+def _decode_credentials_info(encoded_credentials: str) -> dict[str, Any]:
+    """Decode once per credential string; the cached dict is shared, so callers must not mutate it.
+
+    `_build_client` does not cache failures, so a client that cannot be built retries on every
+    download; this keeps the base64/JSON decoding out of that retry path.
+    """
+
+    try:
+        payload = encoded_credentials.strip()
+        padding = "=" * (-len(payload) % 4)
+        decoded_bytes = base64.b64decode(payload + padding)
+        parsed = json.loads(decoded_bytes.decode("utf-8"))
+    except Exception as exc:
+        raise GCSDownloadError("GCS credentials must be valid base64-encoded JSON") from exc
+
+    if not isinstance(parsed, dict):
+        raise GCSDownloadError("GCS credentials JSON must be an object")
+
+    return parsed
@@ -0,0 +1,284 @@
+"""Offline LangExtract runs through the OpenAI Batch API, for backfills that can wait a day.
+
+Batch requests cost half as much as online calls and do not count against the synchronous
+rate limits, but results arrive within 24 hours, so this path is for ingest jobs rather than
+the request path. A run has two phases, both driven through `LangExtractAdapter` so the
+chunking, prompts and span alignment match online extraction exactly:
+
+- `submit` runs LangExtract with a model that records each prompt instead of calling the
+  API, then uploads one chat-completion request per prompt as a batch.
+- `collect` downloads the batch output and runs LangExtract again with a model that replays
+  the stored completions, yielding the same spans an online call would have.
+
+Run it from the command line, e.g. from a nightly job:
+
+    python -m app.services.langextract_batch submit items.jsonl job.json
+    python -m app.services.langextract_batch collect job.json spans.jsonl
+
+`submit` reads one `{"ocr_text": ..., "document_type": ...}` object per line (any other keys,
+such as an id, are echoed back by `collect`) and writes a job file holding the batch id and
+the items. `collect` writes one `{"item": ..., "spans": [...] | null}` line per item once the
+batch has finished, and exits with status 75 (EX_TEMPFAIL) while it is still running.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import sys
+import threading
+from collections.abc import Iterator, Sequence
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+from app.core.config import Settings, get_settings
+from app.core.errors import LangExtractServiceError
+from app.models.schemas import DocumentType, ExtractionSpan
+from app.services.langextract_service import LangExtractAdapter
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_COMPLETION_WINDOW = "24h"
+# Terminal batch states that will never produce an output file.
+_FAILED_BATCH_STATUSES = frozenset({"failed", "expired", "cancelled"})
+# Parses to zero extractions, so the recording pass resolves cleanly without a real answer.
+_EMPTY_OUTPUT = '{"extractions": []}'
+# Matches the system message LangExtract's OpenAI provider sends in JSON mode.
+_JSON_SYSTEM_MESSAGE = "You are a helpful assistant that responds in JSON format."
+# sysexits.h EX_TEMPFAIL: `collect` found the batch still running; try again later.
+EXIT_BATCH_PENDING = 75
+
+
+class LangExtractBatchRunner:
+    """Submit LangExtract work to the OpenAI Batch API and collect the resulting spans."""
+
+    def __init__(
+        self,
+        settings: Settings,
+        *,
+        adapter: LangExtractAdapter | None = None,
+        openai_client: Any | None = None,
+    ) -> None:
+        self._settings = settings
+        self._adapter = adapter or LangExtractAdapter(settings)
+        self._client = openai_client
+
+    def submit(self, items: Sequence[tuple[str, DocumentType]]) -> str:
+        """Upload one request per LangExtract prompt for `items`; returns the batch id.
+
+        Keep `items` to pass to `collect`: the prompts are rebuilt from them, not stored.
+        """
+
+        recorder = _batch_model_classes()[0]()
+        self._adapter.extract_with_model(items, recorder)
+        if not recorder.prompts:
+            raise LangExtractServiceError("Nothing to submit: no prompts were generated")
+
+        lines = [
+            json.dumps(
+                {
+                    "custom_id": _prompt_id(prompt),
+                    "method": "POST",
+                    "url": BATCH_ENDPOINT,
+                    "body": self._request_body(prompt),
+                }
+            )
+            for prompt in recorder.prompts
+        ]
+        client = self._get_client()
+        try:
+            input_file = client.files.create(
+                file=("langextract-batch.jsonl", "\n".join(lines).encode()),
+                purpose="batch",
+            )
+            batch = client.batches.create(
+                input_file_id=input_file.id,
+                endpoint=BATCH_ENDPOINT,
+                completion_window=BATCH_COMPLETION_WINDOW,
+            )
+        except Exception as exc:
+            raise LangExtractServiceError(f"Unable to submit LangExtract batch: {exc}") from exc
+
+        logger.info("Submitted LangExtract batch %s with %d prompts", batch.id, len(lines))
+        return batch.id
+
+    def collect(
+        self, batch_id: str, items: Sequence[tuple[str, DocumentType]]
+    ) -> list[list[ExtractionSpan] | None] | None:
+        """Return spans per item once the batch has finished, or None while it is running.
+
+        `items` must be the sequence passed to `submit`. An item whose completion is missing
+        or unparseable comes back as None; the rest of the batch is still returned.
+        """
+
+        client = self._get_client()
+        try:
+            batch = client.batches.retrieve(batch_id)
+        except Exception as exc:
+            raise LangExtractServiceError(f"Unable to read LangExtract batch {batch_id}: {exc}") from exc
+
+        if batch.status in _FAILED_BATCH_STATUSES:
+            raise LangExtractServiceError(f"LangExtract batch {batch_id} ended as {batch.status}")
+        if batch.status != "completed":
+            return None
+
+        outputs: dict[str, str] = {}
+        if batch.output_file_id:
+            try:
+                content = client.files.content(batch.output_file_id).text
+            except Exception as exc:
+                raise LangExtractServiceError(
+                    f"Unable to download LangExtract batch {batch_id} output: {exc}"
+                ) from exc
+            outputs = dict(_iter_completions(content))
+
+        replayer = _batch_model_classes()[1](outputs)
+        # Replay item by item so one missing or malformed completion only loses its own item.
+        results: list[list[ExtractionSpan] | None] = []
+        for item in items:
+            try:
+                results.append(self._adapter.extract_with_model([item], replayer)[0])
+            except LangExtractServiceError as exc:
+                logger.warning("LangExtract batch %s: dropping an item: %s", batch_id, exc)
+                results.append(None)
+        return results
+
+    def _request_body(self, prompt: str) -> dict[str, Any]:
+        return {
+            "model": self._settings.openai_model,
+            "messages": [
+                {"role": "system", "content": _JSON_SYSTEM_MESSAGE},
+                {"role": "user", "content": prompt},
+            ],
+            "n": 1,
+            "response_format": {"type": "json_object"},
+        }
+
+    def _get_client(self) -> Any:
+        if self._client is None:
+            if not self._settings.openai_api_key:
+                raise LangExtractServiceError("OPENAI_API_KEY is required for batch extraction")
+            try:
+                import openai
+            except Exception as exc:  # pragma: no cover - import guard
+                raise LangExtractServiceError(f"Unable to import openai: {exc}") from exc
+            self._client = openai.OpenAI(api_key=self._settings.openai_api_key)
+        return self._client
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.services.langextract_batch",
+        description="Run LangExtract over OCR texts through the OpenAI Batch API.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    submit = commands.add_parser("submit", help="submit a batch and write its job file")
+    submit.add_argument("items", type=Path, help="JSONL file of {ocr_text, document_type} objects")
+    submit.add_argument("job", type=Path, help="job file to write, for `collect`")
+    collect = commands.add_parser("collect", help="write the spans of a finished batch")
+    collect.add_argument("job", type=Path, help="job file written by `submit`")
+    collect.add_argument("output", type=Path, help="JSONL file to write, one line per item")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    runner = LangExtractBatchRunner(get_settings())
+    try:
+        if args.command == "submit":
+            records = [
+                json.loads(line) for line in args.items.read_text().splitlines() if line.strip()
+            ]
+            batch_id = runner.submit(_parse_items(records))
+            args.job.write_text(json.dumps({"batch_id": batch_id, "items": records}))
+            print(batch_id)
+            return 0
+
+        job = json.loads(args.job.read_text())
+        results = runner.collect(job["batch_id"], _parse_items(job["items"]))
+    except (LangExtractServiceError, OSError, ValueError, KeyError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+
+    if results is None:
+        print(f"Batch {job['batch_id']} is still running", file=sys.stderr)
+        return EXIT_BATCH_PENDING
+    with args.output.open("w") as output:
+        for record, spans in zip(job["items"], results):
+            dumped = None if spans is None else [span.model_dump() for span in spans]
+            output.write(json.dumps({"item": record, "spans": dumped}) + "\n")
+    return 0
+
+
+def _parse_items(records: Sequence[dict[str, Any]]) -> list[tuple[str, DocumentType]]:
+    return [(record["ocr_text"], DocumentType(record["document_type"])) for record in records]
+
+
+def _prompt_id(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode()).hexdigest()
+
+
+def _iter_completions(content: str) -> Iterator[tuple[str, str]]:
+    """Yield (custom_id, message content) for each successful line of a batch output file."""
+
+    for line in content.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            continue
+        choices = (response.get("body") or {}).get("choices") or []
+        if choices:
+            yield record["custom_id"], choices[0]["message"]["content"]
+
+
+@cache
+def _batch_model_classes() -> tuple[type, type]:
+    """Define the recording and replaying models on first use, once langextract is imported."""
+
+    try:
+        from langextract.core.base_model import BaseLanguageModel
+        from langextract.core.types import ScoredOutput
+    except Exception as exc:  # pragma: no cover - import guard
+        raise LangExtractServiceError(f"Unable to import langextract: {exc}") from exc
+
+    class RecordingModel(BaseLanguageModel):
+        """Collect every prompt LangExtract renders, answering each with no extractions."""
+
+        def __init__(self) -> None:
+            super().__init__()
+            self.prompts: list[str] = []
+            self._seen: set[str] = set()
+            self._lock = threading.Lock()
+
+        def infer(self, batch_prompts: Sequence[str], **kwargs: Any) -> Iterator[list[Any]]:
+            with self._lock:
+                for prompt in batch_prompts:
+                    if prompt not in self._seen:
+                        self._seen.add(prompt)
+                        self.prompts.append(prompt)
+            for _ in batch_prompts:
+                yield [ScoredOutput(score=1.0, output=_EMPTY_OUTPUT)]
+
+    class ReplayModel(BaseLanguageModel):
+        """Answer each prompt with its completion from a finished batch."""
+
+        def __init__(self, outputs: dict[str, str]) -> None:
+            super().__init__()
+            self._outputs = outputs
+
+        def infer(self, batch_prompts: Sequence[str], **kwargs: Any) -> Iterator[list[Any]]:
+            for prompt in batch_prompts:
+                output = self._outputs.get(_prompt_id(prompt))
+                if output is None:
+                    raise LookupError("batch output has no completion for this prompt")
+                yield [ScoredOutput(score=1.0, output=output)]
+
+    return RecordingModel, ReplayModel
+
+
+if __name__ == "__main__":
+    sys.exit(main())
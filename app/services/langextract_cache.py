@@ -0,0 +1,77 @@
+"""On-disk cache of LangExtract results, shared across processes and restarts."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.models.schemas import DocumentType, ExtractionSpan
+
+logger = logging.getLogger(__name__)
+
+
+class LangExtractCache:
+    """Content-addressed store of extraction spans, one JSON file per entry.
+
+    Entries are keyed by prompt version, model, document type and the OCR text, so changing
+    any of them misses instead of serving stale spans. Unreadable entries are deleted and
+    treated as misses; write failures are logged and ignored.
+    """
+
+    def __init__(self, directory: Path, *, prompt_version: str) -> None:
+        self._directory = directory
+        self._prompt_version = prompt_version
+
+    def key(self, *, ocr_text: str, document_type: DocumentType, model_id: str) -> str:
+        digest = hashlib.sha256()
+        for part in (self._prompt_version, document_type.value, model_id):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        digest.update(ocr_text.encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> list[ExtractionSpan] | None:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as handle:
+                payload = json.load(handle)
+            return [ExtractionSpan.model_validate(item) for item in payload["spans"]]
+        except FileNotFoundError:
+            return None
+        except Exception as exc:
+            # Corrupt or written by an incompatible schema: drop it and call the model again.
+            logger.debug("Discarding unreadable LangExtract cache entry %s: %s", path, exc)
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            return None
+
+    def set(self, key: str, spans: list[ExtractionSpan]) -> None:
+        path = self._path(key)
+        payload = {
+            "prompt_version": self._prompt_version,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "spans": [span.model_dump() for span in spans],
+        }
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename so concurrent readers never see a partial file.
+            fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=".json")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                    json.dump(payload, handle)
+                os.replace(temp_name, path)
+            except BaseException:
+                os.unlink(temp_name)
+                raise
+        except (OSError, TypeError, ValueError) as exc:
+            logger.debug("Unable to write LangExtract cache entry %s: %s", path, exc)
+
+    def _path(self, key: str) -> Path:
+        return self._directory / key[:2] / f"{key}.json"
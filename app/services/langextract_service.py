@@ -2,17 +2,45 @@
 
 from __future__ import annotations
 
-from typing import Any, Iterable
+import copy
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache, partial
+from operator import attrgetter
+from types import SimpleNamespace
+from typing import Any, Iterable, Sequence
+
+from pydantic import TypeAdapter
 
 from app.core.config import Settings
 from app.core.errors import LangExtractServiceError
 from app.models.schemas import DocumentType, ExtractionSpan
+from app.services.langextract_cache import LangExtractCache
 
+logger = logging.getLogger(__name__)
+
+_SPAN_LIST_ADAPTER = TypeAdapter(list[ExtractionSpan])
+LANGEXTRACT_RETRY_BASE_DELAY_SECONDS = 0.5
+LANGEXTRACT_RETRY_MAX_DELAY_SECONDS = 4.0
+
+# Bump whenever PROMPT_DESCRIPTION or `_example_payloads` changes so cached results miss;
+# it is also part of the OpenAI prompt cache key.
+PROMPT_VERSION = "v1"
 
 PROMPT_DESCRIPTION = """Extract structured fields from OCR text of identity documents (PAN, Aadhaar, Passport, ID Card, Voter ID).
 Return grounded extractions for identifiers, names, dates, nationality, sex/gender, and address fields.
 For passports, MRZ (machine readable zone) lines may be present; you may extract them as `mrz_line_1`/`mrz_line_2`.
 Use the smallest exact text span possible from the source OCR text."""
+# Sent on retries after unparseable output. Fixed text (the error goes to the log) keeps every
+# retry prompt on one shared prefix, so retries still hit OpenAI's prompt cache.
+_RETRY_PROMPT_DESCRIPTION = (
+    f"{PROMPT_DESCRIPTION}\n\n"
+    "A previous attempt returned output that could not be parsed. "
+    "Return only well-formed output in exactly the format shown in the examples."
+)
 
 
 class LangExtractAdapter:
@@ -20,32 +48,246 @@ class LangExtractAdapter:
 
     def __init__(self, settings: Settings) -> None:
         self._settings = settings
+        # Caps concurrent LangExtract calls across v1, v2 and batch requests so bursts stay
+        # under the provider's rate limits; excess calls queue here instead of failing with 429s.
+        self._inflight = threading.BoundedSemaphore(max(settings.openai_max_concurrency, 1))
+        self._model: Any | None = None
+        self._model_lock = threading.Lock()
+        self._models_by_type: dict[DocumentType, Any] = {}
+        self._examples_by_type: dict[DocumentType, list[Any]] = {}
+        self._cache = (
+            LangExtractCache(settings.extraction_cache_dir, prompt_version=PROMPT_VERSION)
+            if settings.extraction_cache_dir is not None
+            else None
+        )
 
     def extract(self, *, ocr_text: str, document_type: DocumentType) -> list[ExtractionSpan]:
+        return self.extract_batch([(ocr_text, document_type)])[0]
+
+    def extract_batch(
+        self, items: Sequence[tuple[str, DocumentType]]
+    ) -> list[list[ExtractionSpan]]:
+        """Extract several OCR texts with one `lx.extract` call per document type.
+
+        LangExtract packs chunks from every document in a call into shared inference batches
+        and reports offsets per document, so results map back by document id. Returns one
+        span list per item, in input order.
+        """
+
         if not self._settings.openai_api_key:
             raise LangExtractServiceError("OPENAI_API_KEY is required for extraction requests")
 
-        try:
-            import langextract as lx
-        except Exception as exc:  # pragma: no cover - import guard
-            raise LangExtractServiceError(f"Unable to import langextract: {exc}") from exc
-
-        examples = self._build_examples(lx, document_type)
-
-        try:
-            result = lx.extract(
-                text_or_documents=ocr_text,
-                prompt_description=PROMPT_DESCRIPTION,
-                examples=examples,
-                model_id=self._settings.openai_model,
-                api_key=self._settings.openai_api_key,
-                fence_output=True,
-                use_schema_constraints=False,
+        cache = self._cache
+        results: list[list[ExtractionSpan]] = [[] for _ in items]
+        cache_keys: list[str | None] = [None] * len(items)
+        pending: dict[DocumentType, list[int]] = {}
+        for index, (ocr_text, document_type) in enumerate(items):
+            if cache is not None:
+                cache_key = cache.key(
+                    ocr_text=ocr_text,
+                    document_type=document_type,
+                    model_id=self._settings.openai_model,
+                )
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    results[index] = cached
+                    continue
+                cache_keys[index] = cache_key
+            pending.setdefault(document_type, []).append(index)
+
+        if not pending:
+            return results
+
+        lx = _import_langextract()
+        for index, spans in self._run_groups(lx, items, pending, None).items():
+            results[index] = spans
+            cache_key = cache_keys[index]
+            if cache is not None and cache_key is not None:
+                cache.set(cache_key, spans)
+
+        return results
+
+    def extract_with_model(
+        self, items: Sequence[tuple[str, DocumentType]], model: Any
+    ) -> list[list[ExtractionSpan]]:
+        """Run `items` through a caller-supplied LangExtract model, bypassing caches and retries.
+
+        Offline batch runs use models that record prompts or replay stored outputs instead
+        of calling the API; their results must not be cached as if they were live ones, and
+        retrying them cannot help, since a replayed output is the same on every attempt.
+        """
+
+        lx = _import_langextract()
+        pending: dict[DocumentType, list[int]] = {}
+        for index, (_, document_type) in enumerate(items):
+            pending.setdefault(document_type, []).append(index)
+        spans_by_index = self._run_groups(lx, items, pending, model)
+        return [spans_by_index[index] for index in range(len(items))]
+
+    def _run_groups(
+        self,
+        lx: Any,
+        items: Sequence[tuple[str, DocumentType]],
+        pending: dict[DocumentType, list[int]],
+        model: Any | None,
+    ) -> dict[int, list[ExtractionSpan]]:
+        # `model=None` runs each group on the adapter's own model for its document type.
+        # Each document type needs its own prompt examples, hence its own call; overlap them
+        # so a mixed batch waits for the slowest call rather than the sum of all of them.
+        groups = list(pending.items())
+        annotate = partial(self._annotate, lx, items, model)
+        if len(groups) == 1:
+            annotated_groups = [annotate(groups[0])]
+        else:
+            annotated_groups = list(_get_group_executor().map(annotate, groups))
+
+        spans_by_index: dict[int, list[ExtractionSpan]] = {}
+        for (_, indexes), annotated in zip(groups, annotated_groups):
+            by_id = {str(_read_attr(document, "document_id")): document for document in annotated}
+            for index in indexes:
+                spans_by_index[index] = self._normalize_output(by_id.get(str(index)))
+        return spans_by_index
+
+    def _annotate(
+        self,
+        lx: Any,
+        items: Sequence[tuple[str, DocumentType]],
+        model: Any | None,
+        group: tuple[DocumentType, list[int]],
+    ) -> list[Any]:
+        document_type, indexes = group
+        max_attempts = 1
+        if model is None:
+            model = self._get_model(lx, document_type)
+            max_attempts = max(self._settings.langextract_max_attempts, 1)
+        documents = [
+            lx.data.Document(text=items[index][0], document_id=str(index)) for index in indexes
+        ]
+        examples = self._get_examples(lx, document_type)
+        return self._extract_with_retries(
+            lx, documents, examples, model, attempt=1, max_attempts=max_attempts
+        )
+
+    def _extract_with_retries(
+        self,
+        lx: Any,
+        documents: list[Any],
+        examples: list[Any],
+        model: Any,
+        *,
+        attempt: int,
+        max_attempts: int,
+    ) -> list[Any]:
+        """Run `lx.extract`, retrying model output that fails to parse.
+
+        `lx.extract` returns nothing for a call that fails part-way, so the first retry of a
+        group re-runs (and re-bills) every document in it; from then on each document gets
+        its own call, so further retries repeat only the documents that fail again.
+        """
+
+        parse_error = getattr(lx.resolver, "ResolverParsingError", ())
+        prompt_description = PROMPT_DESCRIPTION if attempt == 1 else _RETRY_PROMPT_DESCRIPTION
+        while True:
+            with self._inflight:
+                try:
+                    return lx.extract(
+                        text_or_documents=documents,
+                        prompt_description=prompt_description,
+                        examples=examples,
+                        model=model,
+                        max_char_buffer=self._settings.langextract_max_char_buffer,
+                        fence_output=True,
+                        use_schema_constraints=False,
+                    )
+                except parse_error as exc:
+                    # Malformed model output is non-deterministic, so another sample usually
+                    # parses; transport errors are already retried inside the OpenAI client.
+                    if attempt >= max_attempts:
+                        raise LangExtractServiceError(f"LangExtract call failed: {exc}") from exc
+                    error = exc
+                except Exception as exc:
+                    raise LangExtractServiceError(f"LangExtract call failed: {exc}") from exc
+
+            logger.warning(
+                "LangExtract output could not be parsed (attempt %d of %d); retrying: %s",
+                attempt,
+                max_attempts,
+                error,
+            )
+            delay = min(
+                LANGEXTRACT_RETRY_BASE_DELAY_SECONDS * 2 ** (attempt - 1),
+                LANGEXTRACT_RETRY_MAX_DELAY_SECONDS,
             )
-        except Exception as exc:
-            raise LangExtractServiceError(f"LangExtract call failed: {exc}") from exc
+            time.sleep(random.uniform(0, delay))
+            attempt += 1
+            if len(documents) > 1:
+                return [
+                    annotated
+                    for document in documents
+                    for annotated in self._extract_with_retries(
+                        lx, [document], examples, model, attempt=attempt, max_attempts=max_attempts
+                    )
+                ]
+            prompt_description = _RETRY_PROMPT_DESCRIPTION
+
+    def _get_model(self, lx: Any, document_type: DocumentType) -> Any:
+        """Return the model for `document_type`, tagged with its OpenAI prompt cache key.
+
+        The prompt description and examples form an identical prefix on every call for a
+        type; a stable `prompt_cache_key` routes those calls to the same cache on OpenAI's
+        side so the prefix is billed at the cached rate. LangExtract only forwards a fixed
+        list of request parameters, so each type gets a shallow copy of the shared model
+        whose private `_client` adds it; langextract is pinned in pyproject.toml for that.
+        """
+
+        model = self._models_by_type.get(document_type)
+        if model is None:
+            base = self._get_base_model(lx)
+            client = getattr(base, "_client", None)
+            if client is None:
+                raise LangExtractServiceError(
+                    f"LangExtract model {type(base).__name__} has no `_client`; "
+                    "cannot attach the OpenAI prompt_cache_key"
+                )
+            model = copy.copy(base)
+            model._client = _PromptCacheKeyClient(
+                client, f"hstay-ai:{PROMPT_VERSION}:{document_type.value}"
+            )
+            # A racing first build just produces an equivalent copy over the same client.
+            self._models_by_type[document_type] = model
+        return model
+
+    def _get_base_model(self, lx: Any) -> Any:
+        """Return the adapter's language model, built on first use.
+
+        Given only a model id, `lx.extract` builds a new provider per call, and with it a new
+        OpenAI client and connection pool; reusing one model keeps TLS connections alive.
+        """
 
-        return self._normalize_output(result)
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    try:
+                        self._model = lx.factory.create_model(
+                            lx.factory.ModelConfig(
+                                model_id=self._settings.openai_model,
+                                provider_kwargs={"api_key": self._settings.openai_api_key},
+                            ),
+                            fence_output=True,
+                        )
+                    except Exception as exc:
+                        raise LangExtractServiceError(
+                            f"Unable to initialize LangExtract model: {exc}"
+                        ) from exc
+        return self._model
+
+    def _get_examples(self, lx: Any, document_type: DocumentType) -> list[Any]:
+        # The payloads are static, so build each type's examples once and share the list;
+        # a racing first build just produces an identical list.
+        examples = self._examples_by_type.get(document_type)
+        if examples is None:
+            examples = self._examples_by_type[document_type] = self._build_examples(lx, document_type)
+        return examples
 
     def _build_examples(self, lx: Any, document_type: DocumentType) -> list[Any]:
         """Build few-shot examples if the installed LangExtract version exposes typed helpers."""
@@ -53,6 +295,7 @@ class LangExtractAdapter:
         data_mod = getattr(lx, "data", None)
         example_data_cls = getattr(data_mod, "ExampleData", None)
         extraction_cls = getattr(data_mod, "Extraction", None)
+        char_interval_cls = getattr(data_mod, "CharInterval", None)
 
         if example_data_cls is None or extraction_cls is None:
             return []
@@ -68,7 +311,6 @@ class LangExtractAdapter:
                     "extraction_text": item["extraction_text"],
                 }
 
-                char_interval_cls = getattr(data_mod, "CharInterval", None)
                 if char_interval_cls is not None:
                     try:
                         kwargs["char_interval"] = char_interval_cls(
@@ -99,38 +341,45 @@ class LangExtractAdapter:
         return built_examples
 
     def _normalize_output(self, result: Any) -> list[ExtractionSpan]:
-        spans: list[ExtractionSpan] = []
-        extractions = list(self._iter_extractions(result))
-
-        for idx, extraction in enumerate(extractions):
-            extraction_class = _read_attr(extraction, "extraction_class") or "unknown"
-            extraction_text = _read_attr(extraction, "extraction_text") or _read_attr(extraction, "text") or ""
-            attributes = _read_attr(extraction, "attributes")
+        rows: list[dict[str, Any]] = []
+        for idx, extraction in enumerate(self._iter_extractions(result)):
+            read_fields = _read_dict_fields if isinstance(extraction, dict) else _read_object_fields
+            extraction_class, extraction_text, attributes, interval, group_index, extraction_index = (
+                read_fields(extraction)
+            )
+            if not extraction_text:
+                extraction_text = _read_attr(extraction, "text") or ""
             if not isinstance(attributes, dict):
                 attributes = {}
-
-            interval = _read_attr(extraction, "char_interval")
             start_pos, end_pos = _coerce_interval(interval)
 
-            spans.append(
-                ExtractionSpan(
-                    extraction_class=str(extraction_class),
-                    extraction_text=str(extraction_text),
-                    attributes=attributes,
-                    start_pos=start_pos,
-                    end_pos=end_pos,
-                    group_index=_coerce_int(_read_attr(extraction, "group_index")),
-                    extraction_index=_coerce_int(_read_attr(extraction, "extraction_index"))
-                    or idx,
-                )
+            rows.append(
+                {
+                    "extraction_class": str(extraction_class or "unknown"),
+                    "extraction_text": str(extraction_text),
+                    "attributes": attributes,
+                    "start_pos": start_pos,
+                    "end_pos": end_pos,
+                    "group_index": _coerce_int(group_index),
+                    "extraction_index": _coerce_int(extraction_index) or idx,
+                }
             )
 
-        return spans
+        # One validator call for the whole list beats per-span construction, and also beats
+        # `model_construct`, which is pure Python while validation runs in pydantic-core.
+        return _SPAN_LIST_ADAPTER.validate_python(rows)
 
     def _iter_extractions(self, result: Any) -> Iterable[Any]:
         if result is None:
             return []
 
+        # LangExtract hands back one AnnotatedDocument per input, so try its `extractions`
+        # first: one attribute hit instead of two failed `hasattr` probes per document.
+        if not isinstance(result, (list, dict)):
+            extractions = getattr(result, "extractions", None)
+            if isinstance(extractions, list):
+                return extractions
+
         if _looks_like_extraction(result):
             return [result]
 
@@ -146,143 +395,175 @@ class LangExtractAdapter:
         return _extract_extractions_from_document(result)
 
 
+class _PromptCacheKeyClient:
+    """OpenAI client proxy that sends a fixed `prompt_cache_key` with every chat completion."""
+
+    def __init__(self, client: Any, prompt_cache_key: str) -> None:
+        self._client = client
+        self._prompt_cache_key = prompt_cache_key
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_completion))
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+    def _create_completion(self, **params: Any) -> Any:
+        # `extra_body` works on every openai SDK release, including ones without the keyword.
+        extra_body = dict(params.pop("extra_body", None) or {})
+        extra_body["prompt_cache_key"] = self._prompt_cache_key
+        return self._client.chat.completions.create(**params, extra_body=extra_body)
+
+
+def _import_langextract() -> Any:
+    try:
+        import langextract as lx
+    except Exception as exc:  # pragma: no cover - import guard
+        raise LangExtractServiceError(f"Unable to import langextract: {exc}") from exc
+    return lx
+
+
+@cache
+def _get_group_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=len(DocumentType), thread_name_prefix="langextract")
+
+
+_EXAMPLE_PAYLOADS: dict[DocumentType, list[dict[str, Any]]] = {
+    DocumentType.PAN: [
+        {
+            "text": "INCOME TAX DEPARTMENT\nName: RAVI KUMAR\nFather Name: MAHESH KUMAR\nDOB: 12/07/1989\nPAN: ABCDE1234F",
+            "extractions": [
+                {
+                    "extraction_class": "full_name",
+                    "extraction_text": "RAVI KUMAR",
+                    "start_pos": 29,
+                    "end_pos": 39,
+                },
+                {
+                    "extraction_class": "father_name",
+                    "extraction_text": "MAHESH KUMAR",
+                    "start_pos": 53,
+                    "end_pos": 65,
+                },
+                {
+                    "extraction_class": "date_of_birth",
+                    "extraction_text": "12/07/1989",
+                    "start_pos": 71,
+                    "end_pos": 81,
+                },
+                {
+                    "extraction_class": "pan_number",
+                    "extraction_text": "ABCDE1234F",
+                    "start_pos": 87,
+                    "end_pos": 97,
+                },
+            ],
+        }
+    ],
+    DocumentType.AADHAAR: [
+        {
+            "text": "Government of India\nName: SITA DEVI\nDOB: 02/11/1994\nFemale\n1234 5678 9012",
+            "extractions": [
+                {
+                    "extraction_class": "full_name",
+                    "extraction_text": "SITA DEVI",
+                    "start_pos": 28,
+                    "end_pos": 37,
+                },
+                {
+                    "extraction_class": "date_of_birth",
+                    "extraction_text": "02/11/1994",
+                    "start_pos": 43,
+                    "end_pos": 53,
+                },
+                {
+                    "extraction_class": "gender",
+                    "extraction_text": "Female",
+                    "start_pos": 54,
+                    "end_pos": 60,
+                },
+                {
+                    "extraction_class": "aadhaar_number",
+                    "extraction_text": "1234 5678 9012",
+                    "start_pos": 61,
+                    "end_pos": 75,
+                },
+            ],
+        }
+    ],
+    DocumentType.PASSPORT: [
+        {
+            "text": (
+                "REPUBLIC OF INDIA\n"
+                "Passport No: N1234567\n"
+                "Surname: SHARMA\n"
+                "Given Names: AMIT\n"
+                "Nationality: INDIAN\n"
+                "Sex: M\n"
+                "Date of Birth: 10/01/1990"
+            ),
+            "extractions": [
+                {
+                    "extraction_class": "passport_number",
+                    "extraction_text": "N1234567",
+                    "start_pos": 31,
+                    "end_pos": 39,
+                },
+                {
+                    "extraction_class": "surname",
+                    "extraction_text": "SHARMA",
+                    "start_pos": 49,
+                    "end_pos": 55,
+                },
+                {
+                    "extraction_class": "given_names",
+                    "extraction_text": "AMIT",
+                    "start_pos": 69,
+                    "end_pos": 73,
+                },
+                {
+                    "extraction_class": "nationality",
+                    "extraction_text": "INDIAN",
+                    "start_pos": 87,
+                    "end_pos": 93,
+                },
+                {
+                    "extraction_class": "sex",
+                    "extraction_text": "M",
+                    "start_pos": 99,
+                    "end_pos": 100,
+                },
+                {
+                    "extraction_class": "date_of_birth",
+                    "extraction_text": "10/01/1990",
+                    "start_pos": 116,
+                    "end_pos": 126,
+                },
+            ],
+        }
+    ],
+    DocumentType.OTHER: [
+        {
+            "text": "ID CARD\nName: SAMPLE USER\nID: XYZ12345",
+            "extractions": [
+                {
+                    "extraction_class": "full_name",
+                    "extraction_text": "SAMPLE USER",
+                    "start_pos": 14,
+                    "end_pos": 25,
+                },
+                {
+                    "extraction_class": "id_number",
+                    "extraction_text": "XYZ12345",
+                    "start_pos": 31,
+                    "end_pos": 39,
+                },
+            ],
+        }
+    ],
+}
+
+
 def _example_payloads(document_type: DocumentType) -> list[dict[str, Any]]:
-    base_examples: dict[DocumentType, list[dict[str, Any]]] = {
-        DocumentType.PAN: [
-            {
-                "text": "INCOME TAX DEPARTMENT\nName: RAVI KUMAR\nFather Name: MAHESH KUMAR\nDOB: 12/07/1989\nPAN: ABCDE1234F",
-                "extractions": [
-                    {
-                        "extraction_class": "full_name",
-                        "extraction_text": "RAVI KUMAR",
-                        "start_pos": 29,
-                        "end_pos": 39,
-                    },
-                    {
-                        "extraction_class": "father_name",
-                        "extraction_text": "MAHESH KUMAR",
-                        "start_pos": 53,
-                        "end_pos": 65,
-                    },
-                    {
-                        "extraction_class": "date_of_birth",
-                        "extraction_text": "12/07/1989",
-                        "start_pos": 71,
-                        "end_pos": 81,
-                    },
-                    {
-                        "extraction_class": "pan_number",
-                        "extraction_text": "ABCDE1234F",
-                        "start_pos": 87,
-                        "end_pos": 97,
-                    },
-                ],
-            }
-        ],
-        DocumentType.AADHAAR: [
-            {
-                "text": "Government of India\nName: SITA DEVI\nDOB: 02/11/1994\nFemale\n1234 5678 9012",
-                "extractions": [
-                    {
-                        "extraction_class": "full_name",
-                        "extraction_text": "SITA DEVI",
-                        "start_pos": 28,
-                        "end_pos": 37,
-                    },
-                    {
-                        "extraction_class": "date_of_birth",
-                        "extraction_text": "02/11/1994",
-                        "start_pos": 43,
-                        "end_pos": 53,
-                    },
-                    {
-                        "extraction_class": "gender",
-                        "extraction_text": "Female",
-                        "start_pos": 54,
-                        "end_pos": 60,
-                    },
-                    {
-                        "extraction_class": "aadhaar_number",
-                        "extraction_text": "1234 5678 9012",
-                        "start_pos": 61,
-                        "end_pos": 75,
-                    },
-                ],
-            }
-        ],
-        DocumentType.PASSPORT: [
-            {
-                "text": (
-                    "REPUBLIC OF INDIA\n"
-                    "Passport No: N1234567\n"
-                    "Surname: SHARMA\n"
-                    "Given Names: AMIT\n"
-                    "Nationality: INDIAN\n"
-                    "Sex: M\n"
-                    "Date of Birth: 10/01/1990"
-                ),
-                "extractions": [
-                    {
-                        "extraction_class": "passport_number",
-                        "extraction_text": "N1234567",
-                        "start_pos": 31,
-                        "end_pos": 39,
-                    },
-                    {
-                        "extraction_class": "surname",
-                        "extraction_text": "SHARMA",
-                        "start_pos": 49,
-                        "end_pos": 55,
-                    },
-                    {
-                        "extraction_class": "given_names",
-                        "extraction_text": "AMIT",
-                        "start_pos": 69,
-                        "end_pos": 73,
-                    },
-                    {
-                        "extraction_class": "nationality",
-                        "extraction_text": "INDIAN",
-                        "start_pos": 87,
-                        "end_pos": 93,
-                    },
-                    {
-                        "extraction_class": "sex",
-                        "extraction_text": "M",
-                        "start_pos": 99,
-                        "end_pos": 100,
-                    },
-                    {
-                        "extraction_class": "date_of_birth",
-                        "extraction_text": "10/01/1990",
-                        "start_pos": 116,
-                        "end_pos": 126,
-                    },
-                ],
-            }
-        ],
-        DocumentType.OTHER: [
-            {
-                "text": "ID CARD\nName: SAMPLE USER\nID: XYZ12345",
-                "extractions": [
-                    {
-                        "extraction_class": "full_name",
-                        "extraction_text": "SAMPLE USER",
-                        "start_pos": 14,
-                        "end_pos": 25,
-                    },
-                    {
-                        "extraction_class": "id_number",
-                        "extraction_text": "XYZ12345",
-                        "start_pos": 31,
-                        "end_pos": 39,
-                    },
-                ],
-            }
-        ],
-    }
-
-    return base_examples.get(document_type, base_examples[DocumentType.OTHER])
+    return _EXAMPLE_PAYLOADS.get(document_type, _EXAMPLE_PAYLOADS[DocumentType.OTHER])
 
 
 def _extract_extractions_from_document(item: Any) -> list[Any]:
@@ -303,6 +584,31 @@ def _looks_like_extraction(item: Any) -> bool:
     return hasattr(item, "extraction_class") or hasattr(item, "extraction_text")
 
 
+_EXTRACTION_FIELDS = (
+    "extraction_class",
+    "extraction_text",
+    "attributes",
+    "char_interval",
+    "group_index",
+    "extraction_index",
+)
+_get_extraction_fields = attrgetter(*_EXTRACTION_FIELDS)
+
+
+def _read_object_fields(item: Any) -> tuple[Any, ...]:
+    """Read every span field in one C-level call; LangExtract's `Extraction` has them all."""
+
+    try:
+        return _get_extraction_fields(item)
+    except AttributeError:
+        return tuple(getattr(item, name, None) for name in _EXTRACTION_FIELDS)
+
+
+def _read_dict_fields(item: dict[str, Any]) -> tuple[Any, ...]:
+    get = item.get
+    return tuple(get(name) for name in _EXTRACTION_FIELDS)
+
+
 def _read_attr(item: Any, key: str) -> Any:
     if isinstance(item, dict):
         return item.get(key)
@@ -322,8 +628,9 @@ def _coerce_interval(interval: Any) -> tuple[int | None, int | None]:
 
 
 def _coerce_int(value: Any) -> int | None:
-    if value is None:
-        return None
+    # LangExtract positions are already ints or None; only other types pay for the try.
+    if value is None or value.__class__ is int:
+        return value
 
     try:
         return int(value)
@@ -0,0 +1,51 @@
+"""Temp-file helpers shared by the download services."""
+
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from app.core.config import Settings
+
+logger = logging.getLogger(__name__)
+
+# Every download temp file carries this prefix so orphan reaping never touches foreign files.
+TEMP_FILE_PREFIX = "hstay-ai-"
+
+
+def temp_directory(settings: Settings) -> Path:
+    return settings.temp_dir or Path(tempfile.gettempdir())
+
+
+def remove_temp_file(path: Path) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    except OSError as exc:
+        logger.debug("Unable to remove temp file %s: %s", path, exc)
+
+
+def reap_orphan_temp_files(directory: Path, *, max_age_seconds: float) -> int:
+    """Delete download temp files older than `max_age_seconds`, e.g. left by a crashed worker."""
+
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return 0
+
+    for entry in entries:
+        if not entry.name.startswith(TEMP_FILE_PREFIX):
+            continue
+        try:
+            if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+                removed += 1
+        except OSError:
+            continue
+    return removed
@@ -1,17 +1,32 @@
-"""Convenience runner for local development."""
+"""Convenience runner: single-worker autoreload by default, multi-worker with HSTAY_AI_ENV=prod."""
 
 from __future__ import annotations
 
 import os
 
 # Force CPU execution by hiding CUDA devices from PyTorch and related libs.
+# Remove this on GPU nodes (and set OCR_DEVICE=cuda) to run OCR on the GPU.
 os.environ["CUDA_VISIBLE_DEVICES"] = ""
 
 import uvicorn
 
 
 def main() -> None:
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    if os.getenv("HSTAY_AI_ENV", "dev") == "prod":
+        # Each worker is a separate process with its own OCR limit, so OCR scales across cores
+        # and a blocked worker does not stall the others. uvloop and httptools ship with
+        # uvicorn[standard] (via fastapi[standard]).
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=8000,
+            workers=int(os.getenv("UVICORN_WORKERS", os.cpu_count() or 1)),
+            loop="uvloop",
+            http="httptools",
+            log_level="info",
+        )
+    else:
+        uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
 
 
 if __name__ == "__main__":
@@ -1,8 +1,31 @@
 from __future__ import annotations
 
 import sys
+from collections.abc import Iterator
 from pathlib import Path
 
+import pytest
+from fastapi.testclient import TestClient
+
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client() -> TestClient:
+    # Not used as a context manager, so the app lifespan (OCR model preload, GCS client warm-up,
+    # temp-file reaper) never runs: route tests fake every dependency they hit. No route
+    # redirects, so a 3xx should fail the status assertion rather than be followed.
+    return TestClient(app, follow_redirects=False)
+
+
+@pytest.fixture(autouse=True)
+def _restore_dependency_overrides() -> Iterator[None]:
+    # Restore rather than clear, so overrides installed by wider-scoped fixtures survive.
+    snapshot = dict(app.dependency_overrides)
+    yield
+    app.dependency_overrides.clear()
+    app.dependency_overrides.update(snapshot)
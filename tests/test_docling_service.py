@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import Settings
+from app.core.errors import DoclingServiceError
+from app.services import docling_service
+from app.services.docling_service import DoclingAdapter
+
+
+class FakeDocument:
+    def __init__(self, text: str) -> None:
+        self._text = text
+
+    def export_to_text(self) -> str:
+        return self._text
+
+
+class FakeResult:
+    def __init__(self, text: str) -> None:
+        self.document = FakeDocument(text)
+
+
+class FakeConverter:
+    def __init__(self, outcomes: list[str | Exception]) -> None:
+        self._outcomes = outcomes
+        self.calls = 0
+        self.initialized: list[object] = []
+
+    def initialize_pipeline(self, input_format: object) -> None:
+        self.initialized.append(input_format)
+
+    def convert(self, source: object) -> FakeResult:
+        outcome = self._outcomes[self.calls]
+        self.calls += 1
+        if isinstance(outcome, Exception):
+            raise outcome
+        return FakeResult(outcome)
+
+
+def _build_adapter(monkeypatch: pytest.MonkeyPatch, converter: FakeConverter) -> DoclingAdapter:
+    monkeypatch.setattr(docling_service, "get_document_converter", lambda settings: converter)
+    monkeypatch.setattr(docling_service.time, "sleep", lambda seconds: None)
+    settings = Settings(OCR_MAX_ATTEMPTS=3, OCR_PAGE_WORKERS=1)
+    return DoclingAdapter(settings)
+
+
+def test_transient_failure_is_retried(monkeypatch: pytest.MonkeyPatch) -> None:
+    converter = FakeConverter([RuntimeError("Failed to allocate memory for tensor"), "PAN ABCDE1234F"])
+    adapter = _build_adapter(monkeypatch, converter)
+
+    assert adapter.extract_text(Path("sample.png")) == "PAN ABCDE1234F"
+    assert converter.calls == 2
+
+
+def test_permanent_failure_is_not_retried(monkeypatch: pytest.MonkeyPatch) -> None:
+    converter = FakeConverter([ValueError("unsupported image"), "unused"])
+    adapter = _build_adapter(monkeypatch, converter)
+
+    with pytest.raises(DoclingServiceError):
+        adapter.extract_text(Path("sample.png"))
+    assert converter.calls == 1
+
+
+def test_retries_stop_after_max_attempts(monkeypatch: pytest.MonkeyPatch) -> None:
+    converter = FakeConverter([MemoryError()] * 3)
+    adapter = _build_adapter(monkeypatch, converter)
+
+    with pytest.raises(DoclingServiceError):
+        adapter.extract_text(Path("sample.png"))
+    assert converter.calls == 3
+
+
+def test_warm_up_builds_image_and_pdf_pipelines(monkeypatch: pytest.MonkeyPatch) -> None:
+    input_format = SimpleNamespace(IMAGE="image", PDF="pdf")
+    monkeypatch.setitem(
+        sys.modules, "docling.datamodel.base_models", SimpleNamespace(InputFormat=input_format)
+    )
+    converter = FakeConverter([])
+    adapter = _build_adapter(monkeypatch, converter)
+
+    adapter.warm_up()
+
+    assert converter.initialized == ["image", "pdf"]
+    assert converter.calls == 0
+
+
+def test_converter_follows_adapter_ocr_settings(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(docling_service, "_converters", {})
+    monkeypatch.setattr(docling_service, "_build_converter", lambda settings: object())
+    settings = Settings.model_construct(OCR_PAGE_WORKERS=1)
+
+    converter = DoclingAdapter(settings)._converter
+
+    assert DoclingAdapter(settings.model_copy())._converter is converter
+    batched = settings.model_copy(update={"ocr_batch_size": 16})
+    assert DoclingAdapter(batched)._converter is not converter
+    cuda = settings.model_copy(update={"ocr_device": "cuda"})
+    assert DoclingAdapter(cuda)._converter is not converter
+
+
+def test_page_engines_share_onnx_sessions() -> None:
+    template = SimpleNamespace(
+        text_det=SimpleNamespace(session=object(), preprocess_op=None),
+        text_cls=SimpleNamespace(session=object()),
+        text_rec=SimpleNamespace(session=object()),
+    )
+
+    engine = docling_service._share_rapidocr_sessions(template)
+
+    assert engine is not template
+    assert engine.text_det is not template.text_det
+    assert engine.text_det.session is template.text_det.session
+    assert engine.text_cls is template.text_cls
+    assert engine.text_rec is template.text_rec
+
+
+def test_ocr_batch_params_only_set_when_configured() -> None:
+    assert docling_service._ocr_batch_params(Settings()) == {}
+    assert docling_service._ocr_batch_params(Settings(OCR_BATCH_SIZE=16)) == {
+        "Cls.cls_batch_num": 16,
+        "Rec.rec_batch_num": 16,
+    }
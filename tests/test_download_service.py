@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import tempfile
 from pathlib import Path
 
 import httpx
@@ -9,85 +8,159 @@ import pytest
 from app.core.config import Settings
 from app.core.errors import DocumentDownloadError, InvalidDocumentURLError
 from app.services.download_service import DocumentDownloader
+from app.services.temp_files import TEMP_FILE_PREFIX
 
+pytestmark = pytest.mark.anyio
 
-def _build_settings(tmp_path: Path) -> Settings:
-    return Settings(
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+def _build_settings(tmp_path: Path, temp_dir: Path | None = None) -> Settings:
+    return Settings.model_construct(
         IMAGE_DIRECTORY=tmp_path,
         ALLOWED_EXTENSIONS=(".png", ".jpg"),
+        TEMP_DIR=temp_dir,
     )
 
 
-def test_rejects_invalid_scheme(tmp_path: Path) -> None:
+async def test_rejects_invalid_scheme(tmp_path: Path) -> None:
     downloader = DocumentDownloader(settings=_build_settings(tmp_path))
 
     with pytest.raises(InvalidDocumentURLError):
-        downloader.download("file:///tmp/sample.png")
+        await downloader.download("file:///tmp/sample.png")
 
 
-def test_rejects_missing_hostname(tmp_path: Path) -> None:
+async def test_rejects_missing_hostname(tmp_path: Path) -> None:
     downloader = DocumentDownloader(settings=_build_settings(tmp_path))
 
     with pytest.raises(InvalidDocumentURLError):
-        downloader.download("https:///sample.png")
+        await downloader.download("https:///sample.png")
 
 
-def test_allows_localhost_and_downloads(tmp_path: Path) -> None:
+async def test_allows_localhost_and_downloads(tmp_path: Path) -> None:
     transport = httpx.MockTransport(lambda request: httpx.Response(200, content=b"abc123"))
-    with httpx.Client(transport=transport) as client:
+    async with httpx.AsyncClient(transport=transport) as client:
         downloader = DocumentDownloader(settings=_build_settings(tmp_path), http_client=client)
-        downloaded_path = downloader.download("http://localhost/sample.jpg")
+        downloaded_path = await downloader.download("http://localhost/sample.jpg")
 
     assert downloaded_path.suffix == ".jpg"
+    assert downloaded_path.name.startswith(TEMP_FILE_PREFIX)
     assert downloaded_path.read_bytes() == b"abc123"
     downloaded_path.unlink(missing_ok=True)
 
 
-def test_http_error_raises_domain_error(tmp_path: Path) -> None:
+async def test_download_to_memory_returns_content_and_name(tmp_path: Path) -> None:
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=b"abc123"))
+    async with httpx.AsyncClient(transport=transport) as client:
+        downloader = DocumentDownloader(settings=_build_settings(tmp_path), http_client=client)
+        content, filename = await downloader.download_to_memory("https://example.com/sample.jpg")
+
+    assert content == b"abc123"
+    assert filename == "document.jpg"
+
+
+async def test_download_to_memory_enforces_size_limit(tmp_path: Path) -> None:
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=b"0123456789"))
+    async with httpx.AsyncClient(transport=transport) as client:
+        downloader = DocumentDownloader(
+            settings=_build_settings(tmp_path),
+            http_client=client,
+            max_download_bytes=5,
+        )
+        with pytest.raises(DocumentDownloadError):
+            await downloader.download_to_memory("https://example.com/large.jpg")
+
+
+async def test_http_error_raises_domain_error(tmp_path: Path) -> None:
     transport = httpx.MockTransport(lambda request: httpx.Response(404, content=b"missing"))
-    with httpx.Client(transport=transport) as client:
+    async with httpx.AsyncClient(transport=transport) as client:
         downloader = DocumentDownloader(settings=_build_settings(tmp_path), http_client=client)
         with pytest.raises(DocumentDownloadError):
-            downloader.download("https://example.com/missing.png")
+            await downloader.download("https://example.com/missing.png")
 
 
-def test_timeout_raises_domain_error(tmp_path: Path) -> None:
+async def test_timeout_raises_domain_error(tmp_path: Path) -> None:
     def handler(request: httpx.Request) -> httpx.Response:
         raise httpx.ConnectTimeout("timed out", request=request)
 
-    with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
         downloader = DocumentDownloader(settings=_build_settings(tmp_path), http_client=client)
         with pytest.raises(DocumentDownloadError):
-            downloader.download("https://example.com/sample.png")
+            await downloader.download("https://example.com/sample.png")
+
+
+async def test_size_limit_enforced_and_temp_file_deleted(tmp_path: Path) -> None:
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=b"0123456789"))
+    async with httpx.AsyncClient(transport=transport) as client:
+        downloader = DocumentDownloader(
+            settings=_build_settings(tmp_path, temp_dir=tmp_path),
+            http_client=client,
+            max_download_bytes=5,
+        )
+        with pytest.raises(DocumentDownloadError):
+            await downloader.download("https://example.com/large.jpg")
 
+    assert list(tmp_path.iterdir()) == []
 
-def test_size_limit_enforced_and_temp_file_deleted(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
-    original_named_temp_file = tempfile.NamedTemporaryFile
 
-    def named_temp_file(*args: object, **kwargs: object):
-        kwargs.setdefault("dir", tmp_path)
-        return original_named_temp_file(*args, **kwargs)
+async def test_declared_oversize_body_rejected_before_reading(tmp_path: Path) -> None:
+    reads: list[bytes] = []
 
-    monkeypatch.setattr("app.services.download_service.tempfile.NamedTemporaryFile", named_temp_file)
+    class TrackingStream(httpx.AsyncByteStream):
+        async def __aiter__(self):
+            reads.append(b"0123456789")
+            yield b"0123456789"
 
-    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=b"0123456789"))
-    with httpx.Client(transport=transport) as client:
+    transport = httpx.MockTransport(
+        lambda request: httpx.Response(
+            200, headers={"Content-Length": "10"}, stream=TrackingStream()
+        )
+    )
+    async with httpx.AsyncClient(transport=transport) as client:
         downloader = DocumentDownloader(
             settings=_build_settings(tmp_path),
             http_client=client,
             max_download_bytes=5,
         )
         with pytest.raises(DocumentDownloadError):
-            downloader.download("https://example.com/large.jpg")
+            await downloader.download_to_memory("https://example.com/large.jpg")
 
-    assert list(tmp_path.iterdir()) == []
+    assert reads == []
 
 
-def test_unsupported_extension_falls_back_to_png(tmp_path: Path) -> None:
+async def test_unsupported_extension_falls_back_to_png(tmp_path: Path) -> None:
     transport = httpx.MockTransport(lambda request: httpx.Response(200, content=b"abc123"))
-    with httpx.Client(transport=transport) as client:
+    async with httpx.AsyncClient(transport=transport) as client:
         downloader = DocumentDownloader(settings=_build_settings(tmp_path), http_client=client)
-        downloaded_path = downloader.download("https://example.com/sample.bin")
+        downloaded_path = await downloader.download("https://example.com/sample.bin")
 
     assert downloaded_path.suffix == ".png"
     downloaded_path.unlink(missing_ok=True)
+
+
+async def test_extension_allowlist_follows_settings_copies(tmp_path: Path) -> None:
+    settings = _build_settings(tmp_path)
+    assert ".jpg" in settings.allowed_extension_set
+    assert "allowed_extension_set" not in settings.model_dump()
+    pdf_only = settings.model_copy(update={"allowed_extensions": (".pdf",)})
+
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=b"abc123"))
+    async with httpx.AsyncClient(transport=transport) as client:
+        downloader = DocumentDownloader(settings=pdf_only, http_client=client)
+        _, filename = await downloader.download_to_memory("https://example.com/sample.jpg")
+
+    assert filename == "document.png"
+
+
+async def test_aclose_only_closes_owned_client(tmp_path: Path) -> None:
+    owned = DocumentDownloader(settings=_build_settings(tmp_path))
+    await owned.aclose()
+    assert owned.http_client.is_closed
+
+    async with httpx.AsyncClient() as client:
+        shared = DocumentDownloader(settings=_build_settings(tmp_path), http_client=client)
+        await shared.aclose()
+        assert not client.is_closed
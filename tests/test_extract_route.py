@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 
@@ -34,12 +36,13 @@ class FakeService:
         assert self._response is not None
         return self._response
 
+    def process_stream(self, request: ExtractionRequest):
+        yield "ocr"
+        yield "extract"
+        yield self.process(request)
 
-@pytest.fixture
-def client() -> TestClient:
-    with TestClient(app) as test_client:
-        yield test_client
-    app.dependency_overrides.clear()
+    def process_batch(self, requests: list[ExtractionRequest]) -> list[ExtractionResponse]:
+        return [self.process(request) for request in requests]
 
 
 def _sample_response() -> ExtractionResponse:
@@ -73,6 +76,26 @@ def test_extract_success(client: TestClient) -> None:
     assert response.json()["filename"] == "sample.png"
 
 
+def test_extract_batch_success(client: TestClient) -> None:
+    app.dependency_overrides[get_extraction_service] = lambda: FakeService(response=_sample_response())
+
+    response = client.post(
+        "/v1/extract/batch",
+        json={"requests": [{"filename": "sample.png"}, {"filename": "sample.png"}]},
+    )
+
+    assert response.status_code == 200
+    assert [item["filename"] for item in response.json()["results"]] == ["sample.png", "sample.png"]
+
+
+def test_extract_batch_rejects_empty_batch(client: TestClient) -> None:
+    app.dependency_overrides[get_extraction_service] = lambda: FakeService(response=_sample_response())
+
+    response = client.post("/v1/extract/batch", json={"requests": []})
+
+    assert response.status_code == 422
+
+
 @pytest.mark.parametrize(
     ("exc", "expected_status"),
     [
@@ -93,3 +116,43 @@ def test_extract_error_mapping(client: TestClient, exc: Exception, expected_stat
     detail = response.json()["detail"]
     assert "code" in detail
     assert "message" in detail
+
+
+def test_extract_stream_emits_stages_then_result(client: TestClient) -> None:
+    app.dependency_overrides[get_extraction_service] = lambda: FakeService(response=_sample_response())
+
+    response = client.post("/v1/extract/stream", json={"filename": "sample.png"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _parse_sse(response.text)
+    assert [name for name, _ in events] == ["stage", "stage", "result"]
+    assert [data["stage"] for _, data in events[:2]] == ["ocr", "extract"]
+    assert events[2][1]["filename"] == "sample.png"
+
+
+def test_extract_stream_reports_domain_error_as_event(client: TestClient) -> None:
+    app.dependency_overrides[get_extraction_service] = lambda: FakeService(
+        exc=PathTraversalError("bad path")
+    )
+
+    response = client.post("/v1/extract/stream", json={"filename": "../secret.png"})
+
+    assert response.status_code == 200
+    assert _parse_sse(response.text)[-1] == ("error", {"code": "PATH_TRAVERSAL", "message": "bad path"})
+
+
+def _parse_sse(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_healthz_skips_cors(client: TestClient) -> None:
+    response = client.get("/healthz", headers={"Origin": "https://example.com"})
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "healthy", "version": "0.1.0"}
+    assert "access-control-allow-origin" not in response.headers
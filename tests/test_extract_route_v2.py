@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections.abc import Iterator
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -28,6 +29,10 @@ from app.models.schemas import (
     TimingsMs,
 )
 
+_BASE_IDS = {"document_id": "doc1", "organization_id": "org1", "property_id": "prop1"}
+_URL_PAYLOAD = {**_BASE_IDS, "document_url": "https://example.com/sample.png"}
+_GCS_PAYLOAD = {**_BASE_IDS, "bucket": "hstay_kyc", "object_key": "uploads/sample.png"}
+
 
 @dataclass
 class FakeExtractionResult:
@@ -41,10 +46,29 @@ class FakeExtractionResult:
 
 
 class FakeService:
+    __slots__ = (
+        "_result",
+        "_exc",
+        "last_path",
+        "last_data",
+        "last_filename",
+        "last_document_type",
+        "last_include_ocr_text",
+        "last_include_extractions",
+    )
+
     def __init__(self, result: FakeExtractionResult | None = None, exc: Exception | None = None) -> None:
         self._result = result
         self._exc = exc
-        self.last_call: dict[str, object] | None = None
+        self.reset_calls()
+
+    def reset_calls(self) -> None:
+        self.last_path: Path | None = None
+        self.last_data: bytes | None = None
+        self.last_filename: str | None = None
+        self.last_document_type: DocumentType | None = None
+        self.last_include_ocr_text: bool | None = None
+        self.last_include_extractions: bool | None = None
 
     def process_from_path(
         self,
@@ -54,12 +78,31 @@ class FakeService:
         include_ocr_text: bool,
         include_extractions: bool,
     ) -> FakeExtractionResult:
-        self.last_call = {
-            "path": path,
-            "document_type": document_type,
-            "include_ocr_text": include_ocr_text,
-            "include_extractions": include_extractions,
-        }
+        self.last_path = path
+        return self._process(document_type, include_ocr_text, include_extractions)
+
+    def process_from_bytes(
+        self,
+        data: bytes,
+        filename: str,
+        *,
+        document_type: DocumentType | None,
+        include_ocr_text: bool,
+        include_extractions: bool,
+    ) -> FakeExtractionResult:
+        self.last_data = data
+        self.last_filename = filename
+        return self._process(document_type, include_ocr_text, include_extractions)
+
+    def _process(
+        self,
+        document_type: DocumentType | None,
+        include_ocr_text: bool,
+        include_extractions: bool,
+    ) -> FakeExtractionResult:
+        self.last_document_type = document_type
+        self.last_include_ocr_text = include_ocr_text
+        self.last_include_extractions = include_extractions
         if self._exc is not None:
             raise self._exc
         assert self._result is not None
@@ -72,13 +115,20 @@ class FakeURLDownloader:
         self.exc = exc
         self.calls: list[str] = []
 
-    def download(self, url: str) -> Path:
+    async def download(self, url: str) -> Path:
         self.calls.append(url)
         if self.exc is not None:
             raise self.exc
         assert self.path is not None
         return self.path
 
+    async def download_to_memory(self, url: str) -> tuple[bytes, str]:
+        self.calls.append(url)
+        if self.exc is not None:
+            raise self.exc
+        assert self.path is not None
+        return self.path.read_bytes(), self.path.name
+
 
 class FakeGCSDownloader:
     def __init__(self, path: Path | None = None, exc: Exception | None = None) -> None:
@@ -94,14 +144,9 @@ class FakeGCSDownloader:
         return self.path
 
 
-@pytest.fixture
-def client() -> TestClient:
-    with TestClient(app) as test_client:
-        yield test_client
-    app.dependency_overrides.clear()
-
-
-def _sample_result() -> FakeExtractionResult:
+@pytest.fixture(scope="module")
+def sample_result() -> FakeExtractionResult:
+    # Shared by every test in the module; FakeService returns it and nothing mutates it.
     return FakeExtractionResult(
         document_type_requested=None,
         document_type_detected=DocumentType.OTHER,
@@ -113,25 +158,88 @@ def _sample_result() -> FakeExtractionResult:
     )
 
 
-def test_extract_v2_success(client: TestClient, tmp_path: Path) -> None:
-    downloaded_path = tmp_path / "downloaded.png"
-    downloaded_path.write_bytes(b"fake")
-
-    service = FakeService(result=_sample_result())
-    downloader = FakeURLDownloader(path=downloaded_path)
-    gcs_downloader = FakeGCSDownloader(path=tmp_path / "unused.png")
-    app.dependency_overrides[get_extraction_service] = lambda: service
-    app.dependency_overrides[get_document_downloader] = lambda: downloader
-    app.dependency_overrides[get_gcs_downloader] = lambda: gcs_downloader
-
-    payload = {
-        "document_id": "doc1",
-        "organization_id": "org1",
-        "property_id": "prop1",
-        "document_url": "https://example.com/sample.png",
-        "include_ocr_text": True,
-        "include_extractions": True,
+@pytest.fixture(scope="session")
+def _fake_png_path(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    return tmp_path_factory.mktemp("data") / "downloaded.png"
+
+
+@pytest.fixture
+def fake_png(_fake_png_path: Path) -> Path:
+    # One shared path for every success test; the route deletes the file, so rewrite it each time.
+    _fake_png_path.write_bytes(b"fake")
+    return _fake_png_path
+
+
+@pytest.fixture(scope="module")
+def gcs_default_settings(tmp_path_factory: pytest.TempPathFactory) -> Settings:
+    return Settings.model_construct(
+        OPENAI_API_KEY="test-key",
+        IMAGE_DIRECTORY=tmp_path_factory.mktemp("img"),
+        GCS_CREDENTIALS="e30=",
+        GCS_DEFAULT_BUCKET="default-bucket",
+    )
+
+
+@pytest.fixture(scope="module")
+def _provider_registry() -> Iterator[dict[str, object]]:
+    registry: dict[str, object] = {"service": None, "downloader": None, "gcs_downloader": None}
+    overrides = {
+        get_extraction_service: lambda: registry["service"],
+        get_document_downloader: lambda: registry["downloader"],
+        get_gcs_downloader: lambda: registry["gcs_downloader"],
     }
+    app.dependency_overrides.update(overrides)
+    yield registry
+    for dependency in overrides:
+        app.dependency_overrides.pop(dependency, None)
+
+
+@pytest.fixture(autouse=True)
+def providers(_provider_registry: dict[str, object]) -> Iterator[dict[str, object]]:
+    """What the route's service and downloader dependencies resolve to; tests assign fakes here.
+
+    The overrides are installed once per module and read from this dict, so a test only swaps
+    the objects behind them. Every entry is reset to None after each test.
+    """
+
+    yield _provider_registry
+    _provider_registry.update(dict.fromkeys(_provider_registry))
+
+
+@pytest.fixture(scope="module")
+def shared_fakes(
+    sample_result: FakeExtractionResult,
+) -> tuple[FakeService, FakeURLDownloader, FakeGCSDownloader]:
+    return FakeService(result=sample_result), FakeURLDownloader(), FakeGCSDownloader()
+
+
+@pytest.fixture
+def wired_fakes(
+    shared_fakes: tuple[FakeService, FakeURLDownloader, FakeGCSDownloader],
+    providers: dict[str, object],
+) -> Iterator[tuple[FakeService, FakeURLDownloader, FakeGCSDownloader]]:
+    """Module-wide fakes wired into the app; tests set `exc`/`path`, which reset afterwards."""
+
+    service, downloader, gcs_downloader = shared_fakes
+    providers.update(service=service, downloader=downloader, gcs_downloader=gcs_downloader)
+    yield shared_fakes
+    service._exc = None
+    service.reset_calls()
+    for fake in (downloader, gcs_downloader):
+        fake.path = None
+        fake.exc = None
+        fake.calls.clear()
+
+
+def test_extract_v2_success(
+    client: TestClient,
+    wired_fakes: tuple[FakeService, FakeURLDownloader, FakeGCSDownloader],
+    fake_png: Path,
+) -> None:
+    service, downloader, gcs_downloader = wired_fakes
+    downloader.path = fake_png
+
+    payload = {**_URL_PAYLOAD, "include_ocr_text": True, "include_extractions": True}
     response = client.post("/v2/extract", json=payload)
 
     assert response.status_code == 200
@@ -144,35 +252,45 @@ def test_extract_v2_success(client: TestClient, tmp_path: Path) -> None:
     assert body["object_key"] is None
     assert body["timings_ms"]["download"] is not None
     assert body["timings_ms"]["validation"] is None
-    assert service.last_call is not None
-    assert service.last_call["path"] == downloaded_path
+    assert service.last_path == fake_png
     assert downloader.calls == ["https://example.com/sample.png"]
     assert gcs_downloader.calls == []
-    assert not downloaded_path.exists()
-
-
-def test_extract_v2_gcs_success(client: TestClient, tmp_path: Path) -> None:
-    downloaded_path = tmp_path / "downloaded.png"
-    downloaded_path.write_bytes(b"fake")
-
-    service = FakeService(result=_sample_result())
-    downloader = FakeURLDownloader(path=tmp_path / "unused.png")
-    gcs_downloader = FakeGCSDownloader(path=downloaded_path)
-    app.dependency_overrides[get_extraction_service] = lambda: service
-    app.dependency_overrides[get_document_downloader] = lambda: downloader
-    app.dependency_overrides[get_gcs_downloader] = lambda: gcs_downloader
-
-    response = client.post(
-        "/v2/extract",
-        json={
-            "document_id": "doc1",
-            "organization_id": "org1",
-            "property_id": "prop1",
-            "bucket": "hstay_kyc",
-            "object_key": "uploads/sample.png",
-        },
+    assert not fake_png.exists()
+
+
+def test_extract_v2_in_memory_download(
+    client: TestClient,
+    wired_fakes: tuple[FakeService, FakeURLDownloader, FakeGCSDownloader],
+    fake_png: Path,
+) -> None:
+    settings = Settings.model_construct(
+        OPENAI_API_KEY="test-key",
+        IMAGE_DIRECTORY=fake_png.parent,
+        IN_MEMORY_DOWNLOADS=True,
     )
 
+    service, downloader, _ = wired_fakes
+    downloader.path = fake_png
+    app.dependency_overrides[get_settings] = lambda: settings
+
+    response = client.post("/v2/extract", json=_URL_PAYLOAD)
+
+    assert response.status_code == 200
+    assert service.last_data == b"fake"
+    assert service.last_filename == "downloaded.png"
+    assert downloader.calls == ["https://example.com/sample.png"]
+
+
+def test_extract_v2_gcs_success(
+    client: TestClient,
+    wired_fakes: tuple[FakeService, FakeURLDownloader, FakeGCSDownloader],
+    fake_png: Path,
+) -> None:
+    _, downloader, gcs_downloader = wired_fakes
+    gcs_downloader.path = fake_png
+
+    response = client.post("/v2/extract", json=_GCS_PAYLOAD)
+
     assert response.status_code == 200
     body = response.json()
     assert body["document_url"] is None
@@ -180,285 +298,139 @@ def test_extract_v2_gcs_success(client: TestClient, tmp_path: Path) -> None:
     assert body["object_key"] == "uploads/sample.png"
     assert gcs_downloader.calls == [("hstay_kyc", "uploads/sample.png")]
     assert downloader.calls == []
-    assert not downloaded_path.exists()
+    assert not fake_png.exists()
 
 
-def test_extract_v2_gcs_default_bucket_success(client: TestClient, tmp_path: Path) -> None:
-    downloaded_path = tmp_path / "downloaded.png"
-    downloaded_path.write_bytes(b"fake")
-    settings = Settings(
-        OPENAI_API_KEY="test-key",
-        IMAGE_DIRECTORY=tmp_path,
-        GCS_CREDENTIALS="e30=",
-        GCS_DEFAULT_BUCKET="default-bucket",
-    )
-
-    service = FakeService(result=_sample_result())
-    downloader = FakeURLDownloader(path=tmp_path / "unused.png")
-    gcs_downloader = FakeGCSDownloader(path=downloaded_path)
-    app.dependency_overrides[get_extraction_service] = lambda: service
-    app.dependency_overrides[get_document_downloader] = lambda: downloader
-    app.dependency_overrides[get_gcs_downloader] = lambda: gcs_downloader
-    app.dependency_overrides[get_settings] = lambda: settings
+def test_extract_v2_gcs_default_bucket_success(
+    client: TestClient,
+    wired_fakes: tuple[FakeService, FakeURLDownloader, FakeGCSDownloader],
+    gcs_default_settings: Settings,
+    fake_png: Path,
+) -> None:
+    _, _, gcs_downloader = wired_fakes
+    gcs_downloader.path = fake_png
+    app.dependency_overrides[get_settings] = lambda: gcs_default_settings
 
-    response = client.post(
-        "/v2/extract",
-        json={
-            "document_id": "doc1",
-            "organization_id": "org1",
-            "property_id": "prop1",
-            "object_key": "uploads/sample.png",
-        },
-    )
+    response = client.post("/v2/extract", json={**_BASE_IDS, "object_key": "uploads/sample.png"})
 
     assert response.status_code == 200
     body = response.json()
     assert body["bucket"] == "default-bucket"
     assert body["object_key"] == "uploads/sample.png"
     assert gcs_downloader.calls == [("default-bucket", "uploads/sample.png")]
-    assert not downloaded_path.exists()
+    assert not fake_png.exists()
 
 
 def test_extract_v2_source_required_validation(client: TestClient) -> None:
-    response = client.post(
-        "/v2/extract",
-        json={
-            "document_id": "doc1",
-            "organization_id": "org1",
-            "property_id": "prop1",
-        },
-    )
+    response = client.post("/v2/extract", json=_BASE_IDS)
 
     assert response.status_code == 422
 
 
-def test_extract_v2_missing_bucket_returns_400(client: TestClient, tmp_path: Path) -> None:
-    settings = Settings(
-        OPENAI_API_KEY="test-key",
-        IMAGE_DIRECTORY=tmp_path,
-        GCS_CREDENTIALS="e30=",
-        GCS_DEFAULT_BUCKET=None,
-    )
-    service = FakeService(result=_sample_result())
-    downloader = FakeURLDownloader(path=tmp_path / "unused.png")
-    gcs_downloader = FakeGCSDownloader(path=tmp_path / "unused2.png")
-    app.dependency_overrides[get_extraction_service] = lambda: service
-    app.dependency_overrides[get_document_downloader] = lambda: downloader
-    app.dependency_overrides[get_gcs_downloader] = lambda: gcs_downloader
+@pytest.mark.usefixtures("wired_fakes")
+def test_extract_v2_missing_bucket_returns_400(
+    client: TestClient,
+    gcs_default_settings: Settings,
+) -> None:
+    settings = gcs_default_settings.model_copy(update={"gcs_default_bucket": None})
     app.dependency_overrides[get_settings] = lambda: settings
 
-    response = client.post(
-        "/v2/extract",
-        json={
-            "document_id": "doc1",
-            "organization_id": "org1",
-            "property_id": "prop1",
-            "object_key": "uploads/sample.png",
-        },
-    )
+    response = client.post("/v2/extract", json={**_BASE_IDS, "object_key": "uploads/sample.png"})
 
     assert response.status_code == 400
     assert response.json()["detail"]["code"] == InvalidDocumentSourceError.error_code
 
 
-def test_extract_v2_gcs_unavailable_returns_502(client: TestClient, tmp_path: Path) -> None:
-    settings = Settings(
-        OPENAI_API_KEY="test-key",
-        IMAGE_DIRECTORY=tmp_path,
-        GCS_CREDENTIALS="e30=",
-        GCS_DEFAULT_BUCKET="default-bucket",
-    )
-    service = FakeService(result=_sample_result())
-    downloader = FakeURLDownloader(path=tmp_path / "unused.png")
-    app.dependency_overrides[get_extraction_service] = lambda: service
-    app.dependency_overrides[get_document_downloader] = lambda: downloader
-    app.dependency_overrides[get_gcs_downloader] = lambda: None
-    app.dependency_overrides[get_settings] = lambda: settings
+@pytest.mark.usefixtures("wired_fakes")
+def test_extract_v2_gcs_unavailable_returns_502(
+    client: TestClient,
+    providers: dict[str, object],
+    gcs_default_settings: Settings,
+) -> None:
+    providers["gcs_downloader"] = None
+    app.dependency_overrides[get_settings] = lambda: gcs_default_settings
 
-    response = client.post(
-        "/v2/extract",
-        json={
-            "document_id": "doc1",
-            "organization_id": "org1",
-            "property_id": "prop1",
-            "object_key": "uploads/sample.png",
-        },
-    )
+    response = client.post("/v2/extract", json={**_BASE_IDS, "object_key": "uploads/sample.png"})
 
     assert response.status_code == 502
     assert response.json()["detail"]["code"] == GCSDownloadError.error_code
 
 
-def test_extract_v2_object_key_precedence_over_url(client: TestClient, tmp_path: Path) -> None:
-    downloaded_path = tmp_path / "downloaded.png"
-    downloaded_path.write_bytes(b"fake")
-    settings = Settings(
-        OPENAI_API_KEY="test-key",
-        IMAGE_DIRECTORY=tmp_path,
-        GCS_CREDENTIALS="e30=",
-        GCS_DEFAULT_BUCKET="default-bucket",
-    )
-
-    service = FakeService(result=_sample_result())
-    downloader = FakeURLDownloader(path=tmp_path / "unused.png")
-    gcs_downloader = FakeGCSDownloader(path=downloaded_path)
-    app.dependency_overrides[get_extraction_service] = lambda: service
-    app.dependency_overrides[get_document_downloader] = lambda: downloader
-    app.dependency_overrides[get_gcs_downloader] = lambda: gcs_downloader
-    app.dependency_overrides[get_settings] = lambda: settings
+def test_extract_v2_object_key_precedence_over_url(
+    client: TestClient,
+    wired_fakes: tuple[FakeService, FakeURLDownloader, FakeGCSDownloader],
+    gcs_default_settings: Settings,
+    fake_png: Path,
+) -> None:
+    _, downloader, gcs_downloader = wired_fakes
+    gcs_downloader.path = fake_png
+    app.dependency_overrides[get_settings] = lambda: gcs_default_settings
 
-    response = client.post(
-        "/v2/extract",
-        json={
-            "document_id": "doc1",
-            "organization_id": "org1",
-            "property_id": "prop1",
-            "document_url": "https://example.com/sample.png",
-            "object_key": "uploads/sample.png",
-        },
-    )
+    response = client.post("/v2/extract", json={**_URL_PAYLOAD, "object_key": "uploads/sample.png"})
 
     assert response.status_code == 200
     assert gcs_downloader.calls == [("default-bucket", "uploads/sample.png")]
     assert downloader.calls == []
-    assert not downloaded_path.exists()
-
-
-def test_extract_v2_accepts_object_key_alias(client: TestClient, tmp_path: Path) -> None:
-    downloaded_path = tmp_path / "downloaded.png"
-    downloaded_path.write_bytes(b"fake")
-
-    service = FakeService(result=_sample_result())
-    downloader = FakeURLDownloader(path=tmp_path / "unused.png")
-    gcs_downloader = FakeGCSDownloader(path=downloaded_path)
-    app.dependency_overrides[get_extraction_service] = lambda: service
-    app.dependency_overrides[get_document_downloader] = lambda: downloader
-    app.dependency_overrides[get_gcs_downloader] = lambda: gcs_downloader
-
-    response = client.post(
-        "/v2/extract",
-        json={
-            "document_id": "doc1",
-            "organization_id": "org1",
-            "property_id": "prop1",
-            "bucket": "hstay_kyc",
-            "objectKey": "uploads/sample.png",
-        },
-    )
+    assert not fake_png.exists()
+
+
+def test_extract_v2_accepts_object_key_alias(
+    client: TestClient,
+    wired_fakes: tuple[FakeService, FakeURLDownloader, FakeGCSDownloader],
+    fake_png: Path,
+) -> None:
+    _, _, gcs_downloader = wired_fakes
+    gcs_downloader.path = fake_png
+
+    payload = {**_BASE_IDS, "bucket": "hstay_kyc", "objectKey": "uploads/sample.png"}
+    response = client.post("/v2/extract", json=payload)
 
     assert response.status_code == 200
     assert response.json()["object_key"] == "uploads/sample.png"
     assert gcs_downloader.calls == [("hstay_kyc", "uploads/sample.png")]
-    assert not downloaded_path.exists()
-
-
-@pytest.mark.parametrize(
-    ("url_downloader_exc", "gcs_downloader_exc", "service_exc", "expected_status", "payload"),
-    [
-        (
-            InvalidDocumentURLError("bad url"),
-            None,
-            None,
-            400,
-            {
-                "document_id": "doc1",
-                "organization_id": "org1",
-                "property_id": "prop1",
-                "document_url": "https://example.com/sample.png",
-            },
-        ),
-        (
-            DocumentDownloadError("network failure"),
-            None,
-            None,
-            502,
-            {
-                "document_id": "doc1",
-                "organization_id": "org1",
-                "property_id": "prop1",
-                "document_url": "https://example.com/sample.png",
-            },
-        ),
-        (
-            None,
-            GCSDownloadError("gcs network failure"),
-            None,
-            502,
-            {
-                "document_id": "doc1",
-                "organization_id": "org1",
-                "property_id": "prop1",
-                "bucket": "hstay_kyc",
-                "object_key": "uploads/sample.png",
-            },
-        ),
-        (
-            None,
-            None,
-            EmptyOCRTextError("empty"),
-            422,
-            {
-                "document_id": "doc1",
-                "organization_id": "org1",
-                "property_id": "prop1",
-                "document_url": "https://example.com/sample.png",
-            },
-        ),
-        (
-            None,
-            None,
-            LangExtractServiceError("llm failure"),
-            502,
-            {
-                "document_id": "doc1",
-                "organization_id": "org1",
-                "property_id": "prop1",
-                "document_url": "https://example.com/sample.png",
-            },
-        ),
-        (
-            None,
-            None,
-            LangExtractServiceError("llm failure"),
-            502,
-            {
-                "document_id": "doc1",
-                "organization_id": "org1",
-                "property_id": "prop1",
-                "bucket": "hstay_kyc",
-                "object_key": "uploads/sample.png",
-            },
-        ),
-    ],
-)
+    assert not fake_png.exists()
+
+
+# (url downloader error, GCS downloader error, service error, expected status, payload)
+_ErrorCase = tuple[Exception | None, Exception | None, Exception | None, int, dict[str, str]]
+_ERROR_CASES: list[_ErrorCase] = [
+    (InvalidDocumentURLError("bad url"), None, None, 400, _URL_PAYLOAD),
+    (DocumentDownloadError("network failure"), None, None, 502, _URL_PAYLOAD),
+    (None, GCSDownloadError("gcs network failure"), None, 502, _GCS_PAYLOAD),
+    (None, None, EmptyOCRTextError("empty"), 422, _URL_PAYLOAD),
+    (None, None, LangExtractServiceError("llm failure"), 502, _URL_PAYLOAD),
+    (None, None, LangExtractServiceError("llm failure"), 502, _GCS_PAYLOAD),
+]
+
+
 def test_extract_v2_error_mapping(
     client: TestClient,
+    wired_fakes: tuple[FakeService, FakeURLDownloader, FakeGCSDownloader],
     tmp_path: Path,
-    url_downloader_exc: Exception | None,
-    gcs_downloader_exc: Exception | None,
-    service_exc: Exception | None,
-    expected_status: int,
-    payload: dict[str, str],
+    subtests: pytest.Subtests,
 ) -> None:
-    downloaded_path: Path | None = None
-    if url_downloader_exc is None and gcs_downloader_exc is None:
-        downloaded_path = tmp_path / "downloaded.png"
-        downloaded_path.write_bytes(b"fake")
-
-    service = FakeService(result=_sample_result(), exc=service_exc)
-    url_path = downloaded_path if payload.get("document_url") else tmp_path / "unused.png"
-    gcs_path = downloaded_path if payload.get("object_key") else tmp_path / "unused2.png"
-    downloader = FakeURLDownloader(path=url_path, exc=url_downloader_exc)
-    gcs_downloader = FakeGCSDownloader(path=gcs_path, exc=gcs_downloader_exc)
-    app.dependency_overrides[get_extraction_service] = lambda: service
-    app.dependency_overrides[get_document_downloader] = lambda: downloader
-    app.dependency_overrides[get_gcs_downloader] = lambda: gcs_downloader
-
-    response = client.post("/v2/extract", json=payload)
-
-    assert response.status_code == expected_status
-    detail = response.json()["detail"]
-    assert "code" in detail
-    assert "message" in detail
-    if downloaded_path is not None:
-        assert not downloaded_path.exists()
+    # One test with a subtest per case, so the fakes and overrides are wired once.
+    service, downloader, gcs_downloader = wired_fakes
+    for index, case in enumerate(_ERROR_CASES):
+        url_downloader_exc, gcs_downloader_exc, service_exc, expected_status, payload = case
+        error = url_downloader_exc or gcs_downloader_exc or service_exc
+        with subtests.test(msg=f"case {index}: {type(error).__name__}"):
+            downloaded_path: Path | None = None
+            if url_downloader_exc is None and gcs_downloader_exc is None:
+                downloaded_path = tmp_path / "downloaded.png"
+                downloaded_path.write_bytes(b"fake")
+
+            service._exc = service_exc
+            downloader.exc = url_downloader_exc
+            downloader.path = downloaded_path if payload.get("document_url") else None
+            gcs_downloader.exc = gcs_downloader_exc
+            gcs_downloader.path = downloaded_path if payload.get("object_key") else None
+
+            response = client.post("/v2/extract", json=payload)
+
+            assert response.status_code == expected_status
+            detail = response.json()["detail"]
+            assert "code" in detail
+            assert "message" in detail
+            if downloaded_path is not None:
+                assert not downloaded_path.exists()
@@ -13,7 +13,8 @@ from app.core.errors import (
     SourceFileNotFoundError,
 )
 from app.models.schemas import DocumentType, ExtractionRequest, ExtractionSpan
-from app.services.extraction_service import ExtractionService
+from app.services import extraction_service
+from app.services.extraction_service import ExtractionService, _extract_mrz_td3_lines
 
 
 class FakeDoclingAdapter:
@@ -23,17 +24,37 @@ class FakeDoclingAdapter:
     def extract_text(self, image_path: Path) -> str:
         return self._text
 
+    def extract_text_from_bytes(self, data: bytes, filename: str) -> str:
+        return self._text
+
 
 class FakeLangExtractAdapter:
     def __init__(self, spans: list[ExtractionSpan] | None = None, exc: Exception | None = None) -> None:
         self._spans = spans or []
         self._exc = exc
+        self.calls = 0
+        self.batches: list[list[tuple[str, DocumentType]]] = []
 
     def extract(self, *, ocr_text: str, document_type: DocumentType) -> list[ExtractionSpan]:
+        self.calls += 1
         if self._exc:
             raise self._exc
         return list(self._spans)
 
+    def extract_batch(self, items: list[tuple[str, DocumentType]]) -> list[list[ExtractionSpan]]:
+        self.batches.append(list(items))
+        if self._exc:
+            raise self._exc
+        return [list(self._spans) for _ in items]
+
+
+# Each service gets a copy pointed at its own image directory.
+_BASE_SETTINGS = Settings.model_construct(
+    OPENAI_API_KEY="test-key",
+    ALLOWED_EXTENSIONS=(".png", ".jpg"),
+    OCR_PREVIEW_CHARS=32,
+)
+
 
 def _build_service(
     tmp_path: Path,
@@ -42,14 +63,8 @@ def _build_service(
     spans: list[ExtractionSpan] | None = None,
     langextract_exc: Exception | None = None,
 ) -> ExtractionService:
-    settings = Settings(
-        OPENAI_API_KEY="test-key",
-        IMAGE_DIRECTORY=tmp_path,
-        ALLOWED_EXTENSIONS=(".png", ".jpg"),
-        OCR_PREVIEW_CHARS=32,
-    )
     return ExtractionService(
-        settings=settings,
+        settings=_BASE_SETTINGS.model_copy(update={"image_directory": tmp_path}),
         docling_adapter=FakeDoclingAdapter(ocr_text),
         langextract_adapter=FakeLangExtractAdapter(spans=spans, exc=langextract_exc),
     )
@@ -60,6 +75,12 @@ def test_detect_document_type_pan() -> None:
     assert service.detect_document_type("INCOME TAX DEPARTMENT ABCDE1234F") == DocumentType.PAN
 
 
+def test_detect_document_type_pan_requires_word_boundary() -> None:
+    service = _build_service(Path("."), ocr_text="PAN ABCDE1234F")
+    assert service.detect_document_type("REF XABCDE1234F") == DocumentType.OTHER
+    assert service.detect_document_type("PAN:ABCDE1234F") == DocumentType.PAN
+
+
 def test_detect_document_type_aadhaar() -> None:
     service = _build_service(Path("."), ocr_text="Aadhaar 1234 5678 9012")
     assert service.detect_document_type("Government of India 1234 5678 9012") == DocumentType.AADHAAR
@@ -71,6 +92,18 @@ def test_detect_document_type_passport() -> None:
     assert service.detect_document_type(text) == DocumentType.PASSPORT
 
 
+def test_detect_document_type_passport_needs_two_keywords() -> None:
+    service = _build_service(Path("."), ocr_text="passport")
+    assert service.detect_document_type("Date of Issue: 01/01/2020") == DocumentType.OTHER
+    assert service.detect_document_type("Place of Issue: DELHI\nDate of Expiry") == DocumentType.PASSPORT
+
+
+def test_detect_document_type_mrz_header_must_start_line() -> None:
+    service = _build_service(Path("."), ocr_text="passport")
+    assert service.detect_document_type("Name\nP<INDSHARMA<<RAHUL") == DocumentType.PASSPORT
+    assert service.detect_document_type("Ref P<INDSHARMA") == DocumentType.OTHER
+
+
 def test_path_traversal_rejected(tmp_path: Path) -> None:
     service = _build_service(tmp_path, ocr_text="ABCDE1234F")
     request = ExtractionRequest(filename="../secret.png")
@@ -79,6 +112,19 @@ def test_path_traversal_rejected(tmp_path: Path) -> None:
         service.process(request)
 
 
+def test_symlink_escape_rejected(tmp_path: Path) -> None:
+    image_root = tmp_path / "images"
+    outside = tmp_path / "images-other"
+    image_root.mkdir()
+    outside.mkdir()
+    (outside / "secret.png").write_bytes(b"fake")
+    (image_root / "link.png").symlink_to(outside / "secret.png")
+    service = _build_service(image_root, ocr_text="ABCDE1234F")
+
+    with pytest.raises(PathTraversalError):
+        service.process(ExtractionRequest(filename="link.png"))
+
+
 def test_invalid_extension_rejected(tmp_path: Path) -> None:
     service = _build_service(tmp_path, ocr_text="ABCDE1234F")
     request = ExtractionRequest(filename="sample.pdf")
@@ -177,3 +223,128 @@ def test_process_from_path_success(tmp_path: Path) -> None:
     assert result.extractions is not None
     assert result.timings_ms.validation is None
     assert result.timings_ms.download is None
+
+
+def test_process_from_bytes_success(tmp_path: Path) -> None:
+    service = _build_service(tmp_path, ocr_text="INCOME TAX DEPARTMENT\nABCDE1234F")
+
+    result = service.process_from_bytes(b"fake", "document.png")
+
+    assert result.document_type_detected == DocumentType.PAN
+    assert result.fields.pan_number is not None
+    assert result.timings_ms.download is None
+
+
+def test_process_stream_yields_stages_then_response(tmp_path: Path) -> None:
+    (tmp_path / "sample.png").write_bytes(b"fake")
+    service = _build_service(tmp_path, ocr_text="INCOME TAX DEPARTMENT\nABCDE1234F")
+
+    items = list(service.process_stream(ExtractionRequest(filename="sample.png")))
+
+    assert items[:2] == ["ocr", "extract"]
+    assert items[2].filename == "sample.png"
+    assert items[2].document_type_detected == DocumentType.PAN
+
+
+def test_mrz_only_passport_scans_mrz_once(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    mrz_text = (
+        "P<UTOERIKSSON<<ANNA<MARIA<<<<<<<<<<<<<<<<<<<\n"
+        "L898902C36UTO7408122F1204159ZE184226B<<<<<10"
+    )
+    service = _build_service(tmp_path, ocr_text=mrz_text)
+    scanned: list[str] = []
+
+    def counting_scan(ocr_text: str) -> tuple[str | None, str | None]:
+        scanned.append(ocr_text)
+        return _extract_mrz_td3_lines(ocr_text)
+
+    monkeypatch.setattr(extraction_service, "_extract_mrz_td3_lines", counting_scan)
+
+    result = service.process_from_bytes(b"fake", "document.png")
+
+    assert result.document_type_detected == DocumentType.PASSPORT
+    assert result.fields.mrz_line_2.value == "L898902C36UTO7408122F1204159ZE184226B<<<<<10"
+    assert result.fields.nationality.value == "UTO"
+    assert len(scanned) == 1
+
+
+def test_pick_field_prefers_earliest_matching_span(tmp_path: Path) -> None:
+    spans = [
+        ExtractionSpan(extraction_class="Name", extraction_text="RAHUL SHARMA"),
+        ExtractionSpan(extraction_class="full_name", extraction_text="R SHARMA"),
+        ExtractionSpan(extraction_class="name", extraction_text="IGNORED"),
+    ]
+    service = _build_service(tmp_path, ocr_text="INCOME TAX DEPARTMENT\nABCDE1234F", spans=spans)
+
+    result = service.process_from_bytes(b"fake", "document.png")
+
+    assert result.fields.full_name.value == "RAHUL SHARMA"
+    assert result.fields.full_name.source_extraction_class == "Name"
+
+
+def test_repeated_ocr_text_reuses_extracted_spans(tmp_path: Path) -> None:
+    spans = [ExtractionSpan(extraction_class="name", extraction_text="RAHUL SHARMA")]
+    service = _build_service(tmp_path, ocr_text="INCOME TAX DEPARTMENT\nABCDE1234F", spans=spans)
+
+    first = service.process_from_bytes(b"fake", "document.png")
+    second = service.process_from_bytes(b"fake", "document.png")
+    service.process_from_bytes(b"fake", "document.png", document_type=DocumentType.AADHAAR)
+
+    assert service.langextract_adapter.calls == 1
+    assert second.extractions == first.extractions
+    assert second.fields.full_name.value == "RAHUL SHARMA"
+
+
+def test_process_batch_shares_one_extraction_call(tmp_path: Path) -> None:
+    (tmp_path / "a.png").write_bytes(b"fake")
+    (tmp_path / "b.png").write_bytes(b"fake")
+    spans = [ExtractionSpan(extraction_class="name", extraction_text="RAHUL SHARMA")]
+    service = _build_service(tmp_path, ocr_text="INCOME TAX DEPARTMENT\nABCDE1234F", spans=spans)
+    requests = [
+        ExtractionRequest(filename="a.png"),
+        ExtractionRequest(filename="b.png", include_extractions=False),
+    ]
+
+    responses = service.process_batch(requests)
+
+    assert [response.filename for response in responses] == ["a.png", "b.png"]
+    assert responses[0].fields.full_name.value == "RAHUL SHARMA"
+    assert responses[0].extractions == spans
+    assert responses[1].extractions is None
+    assert len(service.langextract_adapter.batches) == 1
+    assert service.langextract_adapter.calls == 0
+
+    service.process_batch(requests)
+    assert len(service.langextract_adapter.batches) == 1
+
+
+def test_process_batch_fails_on_any_invalid_file(tmp_path: Path) -> None:
+    (tmp_path / "a.png").write_bytes(b"fake")
+    service = _build_service(tmp_path, ocr_text="ABCDE1234F")
+
+    with pytest.raises(SourceFileNotFoundError):
+        service.process_batch([ExtractionRequest(filename="a.png"), ExtractionRequest(filename="b.png")])
+    assert service.langextract_adapter.batches == []
+
+
+def test_long_ocr_text_is_truncated_for_extraction(tmp_path: Path) -> None:
+    (tmp_path / "a.png").write_bytes(b"fake")
+    settings = Settings.model_construct(
+        OPENAI_API_KEY="test-key",
+        IMAGE_DIRECTORY=tmp_path,
+        EXTRACTION_MAX_INPUT_CHARS=12,
+    )
+    adapter = FakeLangExtractAdapter()
+    service = ExtractionService(
+        settings=settings,
+        docling_adapter=FakeDoclingAdapter("INCOME TAX DEPARTMENT\nABCDE1234F"),
+        langextract_adapter=adapter,
+    )
+
+    [response] = service.process_batch([ExtractionRequest(filename="a.png")])
+
+    assert adapter.batches == [[("INCOME TAX D", DocumentType.PAN)]]
+    assert any(issue.code == "OCR_TEXT_TRUNCATED" for issue in response.issues)
+    assert response.fields.pan_number.value == "ABCDE1234F"
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
-import tempfile
+import base64
+import json
+import sys
 from pathlib import Path
+from types import SimpleNamespace
+from typing import BinaryIO
 
 import pytest
 
 from app.core.config import Settings
 from app.core.errors import GCSDownloadError
+from app.services import gcs_download_service
 from app.services.gcs_download_service import GCSDownloader
 
 
@@ -14,55 +19,42 @@ class FakeBlob:
     def __init__(
         self,
         *,
-        size: int | None = 6,
         content: bytes = b"abc123",
-        reload_exc: Exception | None = None,
         download_exc: Exception | None = None,
     ) -> None:
-        self.size = size
         self._content = content
-        self._reload_exc = reload_exc
         self._download_exc = download_exc
 
-    def reload(self, client: object | None = None) -> None:
-        if self._reload_exc is not None:
-            raise self._reload_exc
+    def download_to_file(self, file_obj: BinaryIO, start: int = 0, end: int | None = None) -> None:
+        file_obj.write(self.download_as_bytes(start=start, end=end))
 
-    def download_to_filename(self, filename: str) -> None:
+    def download_as_bytes(self, start: int = 0, end: int | None = None) -> bytes:
         if self._download_exc is not None:
             raise self._download_exc
-        Path(filename).write_bytes(self._content)
+        return self._content[start : None if end is None else end + 1]
 
 
-class FakeBucket:
-    def __init__(self, blob: FakeBlob) -> None:
-        self._blob = blob
+def _fake_client(blob: FakeBlob) -> SimpleNamespace:
+    """Stand-in for `storage.Client`: every bucket and object key resolves to `blob`."""
 
-    def blob(self, key: str) -> FakeBlob:
-        return self._blob
+    bucket = SimpleNamespace(blob=lambda key: blob)
+    return SimpleNamespace(bucket=lambda bucket_name: bucket)
 
 
-class FakeClient:
-    def __init__(self, blob: FakeBlob) -> None:
-        self._blob = blob
-
-    def bucket(self, bucket_name: str) -> FakeBucket:
-        return FakeBucket(self._blob)
-
-
-def _build_settings(tmp_path: Path) -> Settings:
-    return Settings(
+def _build_settings(tmp_path: Path, temp_dir: Path | None = None) -> Settings:
+    return Settings.model_construct(
         OPENAI_API_KEY="test-key",
         IMAGE_DIRECTORY=tmp_path,
         ALLOWED_EXTENSIONS=(".png", ".jpg"),
+        TEMP_DIR=temp_dir,
     )
 
 
 def test_download_success(tmp_path: Path) -> None:
-    blob = FakeBlob(size=6, content=b"abc123")
+    blob = FakeBlob(content=b"abc123")
     downloader = GCSDownloader(
         settings=_build_settings(tmp_path),
-        gcs_client=FakeClient(blob),
+        gcs_client=_fake_client(blob),
     )
 
     downloaded_path = downloader.download("hstay_kyc", "uploads/sample.png")
@@ -72,52 +64,108 @@ def test_download_success(tmp_path: Path) -> None:
     downloaded_path.unlink(missing_ok=True)
 
 
+def test_download_to_memory_success(tmp_path: Path) -> None:
+    blob = FakeBlob(content=b"abc123")
+    downloader = GCSDownloader(
+        settings=_build_settings(tmp_path),
+        gcs_client=_fake_client(blob),
+    )
+
+    content, filename = downloader.download_to_memory("hstay_kyc", "uploads/sample.png")
+
+    assert content == b"abc123"
+    assert filename == "sample.png"
+    assert list(tmp_path.iterdir()) == []
+
+
 def test_rejects_unsupported_extension(tmp_path: Path) -> None:
     downloader = GCSDownloader(
         settings=_build_settings(tmp_path),
-        gcs_client=FakeClient(FakeBlob()),
+        gcs_client=_fake_client(FakeBlob()),
     )
 
     with pytest.raises(GCSDownloadError):
         downloader.download("hstay_kyc", "uploads/sample.bin")
 
 
-def test_rejects_oversized_blob(tmp_path: Path) -> None:
-    blob = FakeBlob(size=30)
+def test_rejects_oversized_blob_and_cleans_up(tmp_path: Path) -> None:
+    blob = FakeBlob(content=b"x" * 30)
     downloader = GCSDownloader(
-        settings=_build_settings(tmp_path),
-        gcs_client=FakeClient(blob),
+        settings=_build_settings(tmp_path, temp_dir=tmp_path),
+        gcs_client=_fake_client(blob),
         max_download_bytes=20,
     )
 
-    with pytest.raises(GCSDownloadError):
+    with pytest.raises(GCSDownloadError, match="exceeds limit"):
         downloader.download("hstay_kyc", "uploads/sample.jpg")
+    with pytest.raises(GCSDownloadError, match="exceeds limit"):
+        downloader.download_to_memory("hstay_kyc", "uploads/sample.jpg")
+
+    assert list(tmp_path.iterdir()) == []
 
 
-def test_blob_metadata_failure_maps_to_gcs_error(tmp_path: Path) -> None:
-    blob = FakeBlob(reload_exc=RuntimeError("not found"))
+class TranscodedBlob:
+    """Ignores the Range header, as GCS does for gzip objects it decompresses on the fly."""
+
+    def __init__(self, content: bytes, chunk_size: int = 8) -> None:
+        self._content = content
+        self._chunk_size = chunk_size
+        self.chunks_sent = 0
+
+    def download_to_file(self, file_obj: BinaryIO, start: int = 0, end: int | None = None) -> None:
+        for offset in range(0, len(self._content), self._chunk_size):
+            self.chunks_sent += 1
+            file_obj.write(self._content[offset : offset + self._chunk_size])
+
+
+def test_size_limit_holds_when_range_is_ignored(tmp_path: Path) -> None:
+    blob = TranscodedBlob(b"x" * 1000)
+    downloader = GCSDownloader(
+        settings=_build_settings(tmp_path, temp_dir=tmp_path),
+        gcs_client=_fake_client(blob),
+        max_download_bytes=20,
+    )
+
+    with pytest.raises(GCSDownloadError, match="exceeds limit"):
+        downloader.download("hstay_kyc", "uploads/sample.jpg")
+    assert blob.chunks_sent == 3
+    with pytest.raises(GCSDownloadError, match="exceeds limit"):
+        downloader.download_to_memory("hstay_kyc", "uploads/sample.jpg")
+    assert blob.chunks_sent == 6
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_blob_at_size_limit_is_accepted(tmp_path: Path) -> None:
+    blob = FakeBlob(content=b"x" * 20)
     downloader = GCSDownloader(
         settings=_build_settings(tmp_path),
-        gcs_client=FakeClient(blob),
+        gcs_client=_fake_client(blob),
+        max_download_bytes=20,
     )
 
-    with pytest.raises(GCSDownloadError):
-        downloader.download("hstay_kyc", "uploads/sample.png")
+    downloaded_path = downloader.download("hstay_kyc", "uploads/sample.jpg")
 
+    assert downloaded_path.read_bytes() == b"x" * 20
+    downloaded_path.unlink(missing_ok=True)
 
-def test_failed_download_cleans_up_temp_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
-    original_named_temp_file = tempfile.NamedTemporaryFile
 
-    def named_temp_file(*args: object, **kwargs: object):
-        kwargs.setdefault("dir", tmp_path)
-        return original_named_temp_file(*args, **kwargs)
+def test_missing_object_maps_to_gcs_error(tmp_path: Path) -> None:
+    blob = FakeBlob(download_exc=RuntimeError("404 not found"))
+    downloader = GCSDownloader(
+        settings=_build_settings(tmp_path),
+        gcs_client=_fake_client(blob),
+    )
+
+    with pytest.raises(GCSDownloadError):
+        downloader.download_to_memory("hstay_kyc", "uploads/sample.png")
 
-    monkeypatch.setattr("app.services.gcs_download_service.tempfile.NamedTemporaryFile", named_temp_file)
 
+def test_failed_download_cleans_up_temp_file(tmp_path: Path) -> None:
     blob = FakeBlob(download_exc=RuntimeError("download failed"))
     downloader = GCSDownloader(
-        settings=_build_settings(tmp_path),
-        gcs_client=FakeClient(blob),
+        settings=_build_settings(tmp_path, temp_dir=tmp_path),
+        gcs_client=_fake_client(blob),
     )
 
     with pytest.raises(GCSDownloadError):
@@ -137,3 +185,76 @@ def test_invalid_base64_credentials_raises_error(tmp_path: Path) -> None:
 
     with pytest.raises(GCSDownloadError):
         downloader.download("hstay_kyc", "uploads/sample.png")
+
+
+def test_warm_up_surfaces_credential_errors(tmp_path: Path) -> None:
+    settings = Settings(
+        OPENAI_API_KEY="test-key",
+        IMAGE_DIRECTORY=tmp_path,
+        GCS_CREDENTIALS="not-valid-base64",
+    )
+    downloader = GCSDownloader(settings=settings)
+
+    with pytest.raises(GCSDownloadError):
+        downloader.warm_up()
+
+
+class FakeCredentials:
+    def __init__(self, scopes: tuple[str, ...] = ()) -> None:
+        self.scopes = scopes
+        self.project_id = "hstay"
+
+    def with_scopes(self, scopes: tuple[str, ...]) -> FakeCredentials:
+        return FakeCredentials(tuple(scopes))
+
+
+class FakeSession:
+    def __init__(self, credentials: FakeCredentials) -> None:
+        self.credentials = credentials
+        self.adapters: dict[str, object] = {}
+
+    def mount(self, prefix: str, adapter: object) -> None:
+        self.adapters[prefix] = adapter
+
+
+class FakeStorageClient:
+    SCOPE = ("https://www.googleapis.com/auth/devstorage.full_control",)
+
+    def __init__(self, *, project: str, credentials: FakeCredentials, _http: FakeSession) -> None:
+        self.project = project
+        self.http = _http
+
+
+def test_client_session_uses_scoped_credentials(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    service_account = SimpleNamespace(
+        Credentials=SimpleNamespace(from_service_account_info=lambda info: FakeCredentials())
+    )
+    modules = {
+        "google": SimpleNamespace(),
+        "google.auth": SimpleNamespace(),
+        "google.auth.transport": SimpleNamespace(),
+        "google.auth.transport.requests": SimpleNamespace(AuthorizedSession=FakeSession),
+        "google.cloud": SimpleNamespace(storage=SimpleNamespace(Client=FakeStorageClient)),
+        "google.oauth2": SimpleNamespace(service_account=service_account),
+        "google.oauth2.service_account": service_account,
+        "requests": SimpleNamespace(),
+        "requests.adapters": SimpleNamespace(HTTPAdapter=lambda **kwargs: kwargs),
+    }
+    for name, module in modules.items():
+        monkeypatch.setitem(sys.modules, name, module)
+    gcs_download_service._build_client.cache_clear()
+    credentials = base64.b64encode(json.dumps({"project_id": "hstay"}).encode()).decode()
+    settings = Settings(
+        OPENAI_API_KEY="test-key", IMAGE_DIRECTORY=tmp_path, GCS_CREDENTIALS=credentials
+    )
+
+    try:
+        client = GCSDownloader(settings=settings)._get_client()
+    finally:
+        gcs_download_service._build_client.cache_clear()
+
+    assert client.http.credentials.scopes == FakeStorageClient.SCOPE
+    pool_size = gcs_download_service.GCS_HTTP_POOL_SIZE
+    assert client.http.adapters["https://"]["pool_maxsize"] == pool_size
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import json
+import sys
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from app.core.config import Settings
+from app.core.errors import LangExtractServiceError
+from app.models.schemas import DocumentType
+from app.services import langextract_batch, langextract_service
+from app.services.langextract_batch import LangExtractBatchRunner
+
+_ITEMS = [
+    ("INCOME TAX DEPARTMENT\nPAN: ABCDE1234F", DocumentType.PAN),
+    ("Government of India\n1234 5678 9012", DocumentType.AADHAAR),
+]
+# What the model "answers" for a prompt containing each item's text.
+_ANSWERS = {
+    _ITEMS[0][0]: {"extraction_class": "pan_number", "extraction_text": "ABCDE1234F"},
+    _ITEMS[1][0]: {"extraction_class": "aadhaar_number", "extraction_text": "1234 5678 9012"},
+}
+
+
+class FakeParsingError(Exception):
+    pass
+
+
+class FakeBaseLanguageModel:
+    def __init__(self, **kwargs: Any) -> None:
+        pass
+
+
+@dataclass
+class FakeScoredOutput:
+    score: float
+    output: str
+
+
+def _fake_extract(
+    *, text_or_documents: list[Any], prompt_description: str, model: Any, **kwargs: Any
+) -> list[Any]:
+    # Like LangExtract: render one prompt per document, ask the model, parse its JSON answer.
+    documents = list(text_or_documents)
+    prompts = [f"{prompt_description}\n\n{document.text}" for document in documents]
+    annotated = []
+    for document, outputs in zip(documents, model.infer(prompts)):
+        try:
+            extractions = json.loads(outputs[0].output)["extractions"]
+        except ValueError as exc:
+            raise FakeParsingError(str(exc)) from exc
+        annotated.append(SimpleNamespace(document_id=document.document_id, extractions=extractions))
+    return annotated
+
+
+@pytest.fixture(autouse=True)
+def fake_langextract(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    lx = SimpleNamespace(
+        data=SimpleNamespace(Document=SimpleNamespace),
+        resolver=SimpleNamespace(ResolverParsingError=FakeParsingError),
+        extract=_fake_extract,
+    )
+    monkeypatch.setitem(sys.modules, "langextract", lx)
+    base_model = SimpleNamespace(BaseLanguageModel=FakeBaseLanguageModel)
+    monkeypatch.setitem(sys.modules, "langextract.core.base_model", base_model)
+    types = SimpleNamespace(ScoredOutput=FakeScoredOutput)
+    monkeypatch.setitem(sys.modules, "langextract.core.types", types)
+    # The model classes subclass whatever BaseLanguageModel was importable when first built.
+    langextract_batch._batch_model_classes.cache_clear()
+    yield
+    langextract_batch._batch_model_classes.cache_clear()
+
+
+class FakeOpenAIClient:
+    """Just the Files and Batches calls the runner makes, with the batch state set by tests."""
+
+    def __init__(self) -> None:
+        self.uploaded: list[dict[str, Any]] = []
+        self.status = "in_progress"
+        self.output: str | None = None
+        self.files = SimpleNamespace(create=self._create_file, content=self._file_content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve_batch)
+
+    def _create_file(self, *, file: tuple[str, bytes], purpose: str) -> Any:
+        assert purpose == "batch"
+        self.uploaded = [json.loads(line) for line in file[1].decode().splitlines()]
+        return SimpleNamespace(id="file-in")
+
+    def _create_batch(self, *, input_file_id: str, endpoint: str, completion_window: str) -> Any:
+        assert input_file_id == "file-in"
+        return SimpleNamespace(id="batch-1")
+
+    def _retrieve_batch(self, batch_id: str) -> Any:
+        output_file_id = "file-out" if self.output is not None else None
+        return SimpleNamespace(id=batch_id, status=self.status, output_file_id=output_file_id)
+
+    def _file_content(self, file_id: str) -> Any:
+        assert file_id == "file-out"
+        return SimpleNamespace(text=self.output)
+
+    def complete(
+        self, *, failed_texts: tuple[str, ...] = (), malformed_texts: tuple[str, ...] = ()
+    ) -> None:
+        """Finish the batch, answering every uploaded prompt.
+
+        `failed_texts` get a 500 instead; `malformed_texts` get an answer that does not parse.
+        """
+
+        lines = []
+        for request in self.uploaded:
+            prompt = request["body"]["messages"][-1]["content"]
+            text = next(text for text in _ANSWERS if text in prompt)
+            response: dict[str, Any] = {"status_code": 500, "body": {}}
+            if text not in failed_texts:
+                content = json.dumps({"extractions": [_ANSWERS[text]]})
+                if text in malformed_texts:
+                    content = content[:-2]
+                choices = [{"message": {"content": content}}]
+                response = {"status_code": 200, "body": {"choices": choices}}
+            record = {"custom_id": request["custom_id"], "response": response, "error": None}
+            lines.append(json.dumps(record))
+        self.status = "completed"
+        self.output = "\n".join(lines)
+
+
+def _build_runner(client: FakeOpenAIClient) -> LangExtractBatchRunner:
+    settings = Settings.model_construct(OPENAI_API_KEY="test-key", OPENAI_MODEL="gpt-4o-mini")
+    return LangExtractBatchRunner(settings, openai_client=client)
+
+
+def test_submit_then_collect_round_trips_spans() -> None:
+    client = FakeOpenAIClient()
+    runner = _build_runner(client)
+
+    batch_id = runner.submit(_ITEMS)
+
+    assert batch_id == "batch-1"
+    assert len(client.uploaded) == len(_ITEMS)
+    assert {request["body"]["model"] for request in client.uploaded} == {"gpt-4o-mini"}
+    client.complete()
+    results = runner.collect(batch_id, _ITEMS)
+
+    assert results is not None
+    assert [[span.extraction_text for span in spans] for spans in results] == [
+        ["ABCDE1234F"],
+        ["1234 5678 9012"],
+    ]
+
+
+def test_failed_completion_only_drops_its_item() -> None:
+    client = FakeOpenAIClient()
+    runner = _build_runner(client)
+    batch_id = runner.submit(_ITEMS)
+    client.complete(failed_texts=(_ITEMS[1][0],))
+
+    results = runner.collect(batch_id, _ITEMS)
+
+    assert results is not None
+    assert [span.extraction_text for span in results[0]] == ["ABCDE1234F"]
+    assert results[1] is None
+
+
+def test_malformed_completion_is_dropped_without_retrying(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    client = FakeOpenAIClient()
+    runner = _build_runner(client)
+    batch_id = runner.submit(_ITEMS)
+    client.complete(malformed_texts=(_ITEMS[0][0],))
+    sleeps: list[float] = []
+    monkeypatch.setattr(langextract_service.time, "sleep", sleeps.append)
+
+    results = runner.collect(batch_id, _ITEMS)
+
+    assert results is not None
+    assert results[0] is None
+    assert [span.extraction_text for span in results[1]] == ["1234 5678 9012"]
+    assert sleeps == []
+
+
+def test_missing_completion_only_drops_its_item() -> None:
+    client = FakeOpenAIClient()
+    runner = _build_runner(client)
+    batch_id = runner.submit(_ITEMS)
+    client.complete()
+    assert client.output is not None
+    client.output = client.output.splitlines()[0]
+
+    results = runner.collect(batch_id, _ITEMS)
+
+    assert results is not None
+    kept = [spans for spans in results if spans is not None]
+    assert len(kept) == 1
+    assert len(kept[0]) == 1
+
+
+@pytest.mark.parametrize("status", ["failed", "expired", "cancelled"])
+def test_terminal_batch_status_raises(status: str) -> None:
+    client = FakeOpenAIClient()
+    client.status = status
+
+    with pytest.raises(LangExtractServiceError, match=status):
+        _build_runner(client).collect("batch-1", _ITEMS)
+
+
+def test_unfinished_batch_returns_none() -> None:
+    client = FakeOpenAIClient()
+
+    assert _build_runner(client).collect("batch-1", _ITEMS) is None
+
+
+def test_cli_submits_then_collects(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    client = FakeOpenAIClient()
+    runner = _build_runner(client)
+    monkeypatch.setattr(langextract_batch, "LangExtractBatchRunner", lambda settings: runner)
+    items_path = tmp_path / "items.jsonl"
+    items_path.write_text(
+        "\n".join(
+            json.dumps({"id": f"doc-{index}", "ocr_text": text, "document_type": document_type})
+            for index, (text, document_type) in enumerate(_ITEMS)
+        )
+    )
+    job_path = tmp_path / "job.json"
+    output_path = tmp_path / "spans.jsonl"
+
+    assert langextract_batch.main(["submit", str(items_path), str(job_path)]) == 0
+    collect_args = ["collect", str(job_path), str(output_path)]
+    assert langextract_batch.main(collect_args) == langextract_batch.EXIT_BATCH_PENDING
+    assert not output_path.exists()
+    client.complete()
+    assert langextract_batch.main(collect_args) == 0
+
+    lines = [json.loads(line) for line in output_path.read_text().splitlines()]
+    assert [line["item"]["id"] for line in lines] == ["doc-0", "doc-1"]
+    assert [[span["extraction_text"] for span in line["spans"]] for line in lines] == [
+        ["ABCDE1234F"],
+        ["1234 5678 9012"],
+    ]
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from app.models.schemas import DocumentType, ExtractionSpan
+from app.services.langextract_cache import LangExtractCache
+
+
+def _span() -> ExtractionSpan:
+    return ExtractionSpan(
+        extraction_class="pan_number",
+        extraction_text="ABCDE1234F",
+        start_pos=4,
+        end_pos=14,
+        extraction_index=0,
+    )
+
+
+def test_round_trip(tmp_path: Path) -> None:
+    cache = LangExtractCache(tmp_path, prompt_version="v1")
+    key = cache.key(ocr_text="PAN ABCDE1234F", document_type=DocumentType.PAN, model_id="gpt-4o")
+
+    assert cache.get(key) is None
+    cache.set(key, [_span()])
+
+    assert cache.get(key) == [_span()]
+    assert LangExtractCache(tmp_path, prompt_version="v1").get(key) == [_span()]
+
+
+def test_key_covers_prompt_version_model_and_type(tmp_path: Path) -> None:
+    cache = LangExtractCache(tmp_path, prompt_version="v1")
+    key = cache.key(ocr_text="text", document_type=DocumentType.PAN, model_id="gpt-4o")
+
+    assert key != cache.key(ocr_text="text", document_type=DocumentType.AADHAAR, model_id="gpt-4o")
+    assert key != cache.key(ocr_text="text", document_type=DocumentType.PAN, model_id="gpt-4o-mini")
+    assert key != LangExtractCache(tmp_path, prompt_version="v2").key(
+        ocr_text="text", document_type=DocumentType.PAN, model_id="gpt-4o"
+    )
+
+
+def test_unreadable_entry_is_discarded(tmp_path: Path) -> None:
+    cache = LangExtractCache(tmp_path, prompt_version="v1")
+    key = cache.key(ocr_text="text", document_type=DocumentType.PAN, model_id="gpt-4o")
+    cache.set(key, [_span()])
+    entry = tmp_path / key[:2] / f"{key}.json"
+    entry.write_text('{"spans": [{"extraction_class": 1}]}')
+
+    assert cache.get(key) is None
+    assert not entry.exists()
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from app.core.config import Settings
+from app.core.errors import LangExtractServiceError
+from app.models.schemas import DocumentType
+from app.services import langextract_service
+from app.services.langextract_service import PROMPT_DESCRIPTION, LangExtractAdapter
+
+
+class FakeParsingError(Exception):
+    pass
+
+
+class FakeLangExtract:
+    """`lx` stand-in whose `extract` fails to parse on the calls listed in `failing_calls`."""
+
+    def __init__(
+        self, failing_calls: set[int] | None = None, error: Exception | None = None
+    ) -> None:
+        self.data = SimpleNamespace(Document=SimpleNamespace)
+        self.resolver = SimpleNamespace(ResolverParsingError=FakeParsingError)
+        self._failing_calls = failing_calls or set()
+        self._error = error
+        self.calls: list[tuple[list[str], str]] = []
+
+    def extract(
+        self, *, text_or_documents: list[Any], prompt_description: str, **kwargs: Any
+    ) -> list[Any]:
+        document_ids = [document.document_id for document in text_or_documents]
+        self.calls.append((document_ids, prompt_description))
+        if self._error is not None:
+            raise self._error
+        if len(self.calls) in self._failing_calls:
+            raise FakeParsingError("unterminated fence")
+        return [
+            SimpleNamespace(
+                document_id=document.document_id,
+                extractions=[{"extraction_class": "pan_number", "extraction_text": document.text}],
+            )
+            for document in text_or_documents
+        ]
+
+
+def _extract(
+    monkeypatch: pytest.MonkeyPatch, lx: FakeLangExtract, texts: list[str]
+) -> list[list[str]]:
+    monkeypatch.setattr(langextract_service, "_import_langextract", lambda: lx)
+    monkeypatch.setattr(langextract_service.time, "sleep", lambda seconds: None)
+    adapter = LangExtractAdapter(
+        Settings.model_construct(OPENAI_API_KEY="test-key", LANGEXTRACT_MAX_ATTEMPTS=3)
+    )
+    monkeypatch.setattr(adapter, "_get_model", lambda lx, document_type: object())
+    results = adapter.extract_batch([(text, DocumentType.PAN) for text in texts])
+    return [[span.extraction_text for span in spans] for spans in results]
+
+
+def test_unparseable_output_is_retried_with_feedback(monkeypatch: pytest.MonkeyPatch) -> None:
+    lx = FakeLangExtract(failing_calls={1})
+
+    assert _extract(monkeypatch, lx, ["ABCDE1234F"]) == [["ABCDE1234F"]]
+    assert [prompt for _, prompt in lx.calls] == [
+        PROMPT_DESCRIPTION,
+        langextract_service._RETRY_PROMPT_DESCRIPTION,
+    ]
+    assert lx.calls[1][1].startswith(PROMPT_DESCRIPTION)
+
+
+def test_retries_stop_after_max_attempts(monkeypatch: pytest.MonkeyPatch) -> None:
+    lx = FakeLangExtract(failing_calls={1, 2, 3, 4})
+
+    with pytest.raises(LangExtractServiceError, match="unterminated fence"):
+        _extract(monkeypatch, lx, ["ABCDE1234F"])
+    assert len(lx.calls) == 3
+
+
+def test_other_errors_are_not_retried(monkeypatch: pytest.MonkeyPatch) -> None:
+    lx = FakeLangExtract(error=RuntimeError("invalid api key"))
+
+    with pytest.raises(LangExtractServiceError):
+        _extract(monkeypatch, lx, ["ABCDE1234F"])
+    assert len(lx.calls) == 1
+
+
+def test_group_retries_continue_per_document(monkeypatch: pytest.MonkeyPatch) -> None:
+    # The group call fails, then the second document fails once more on its own.
+    lx = FakeLangExtract(failing_calls={1, 3})
+
+    assert _extract(monkeypatch, lx, ["ABCDE1234F", "FGHIJ5678K"]) == [
+        ["ABCDE1234F"],
+        ["FGHIJ5678K"],
+    ]
+    assert [document_ids for document_ids, _ in lx.calls] == [["0", "1"], ["0"], ["1"], ["1"]]
+
+
+class FakeOpenAIClient:
+    def __init__(self) -> None:
+        self.base_url = "https://api.openai.com/v1"
+        self.requests: list[dict[str, Any]] = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **params: Any) -> str:
+        self.requests.append(params)
+        return "completion"
+
+
+def _fake_factory(model: Any) -> Any:
+    return SimpleNamespace(
+        factory=SimpleNamespace(
+            ModelConfig=lambda **kwargs: kwargs,
+            create_model=lambda config, fence_output: model,
+        )
+    )
+
+
+def test_models_send_a_prompt_cache_key_per_document_type() -> None:
+    client = FakeOpenAIClient()
+    base = SimpleNamespace(model_id="gpt-4o", _client=client)
+    lx = _fake_factory(base)
+    adapter = LangExtractAdapter(Settings.model_construct())
+
+    pan_model = adapter._get_model(lx, DocumentType.PAN)
+    pan_model._client.chat.completions.create(model="gpt-4o", messages=[])
+    adapter._get_model(lx, DocumentType.AADHAAR)._client.chat.completions.create(
+        model="gpt-4o", messages=[], extra_body={"seed": 7}
+    )
+
+    assert client.requests == [
+        {"model": "gpt-4o", "messages": [], "extra_body": {"prompt_cache_key": "hstay-ai:v1:PAN"}},
+        {
+            "model": "gpt-4o",
+            "messages": [],
+            "extra_body": {"seed": 7, "prompt_cache_key": "hstay-ai:v1:AADHAAR"},
+        },
+    ]
+    assert adapter._get_model(lx, DocumentType.PAN) is pan_model
+    assert pan_model.model_id == "gpt-4o"
+    assert pan_model._client.base_url == client.base_url
+    assert base._client is client
+
+
+def test_model_without_client_fails_loudly() -> None:
+    base = SimpleNamespace(model_id="gpt-4o")
+    adapter = LangExtractAdapter(Settings.model_construct())
+
+    with pytest.raises(LangExtractServiceError, match="prompt_cache_key"):
+        adapter._get_model(_fake_factory(base), DocumentType.PAN)
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+
+from app.services.temp_files import TEMP_FILE_PREFIX, reap_orphan_temp_files
+
+
+def test_reaps_only_stale_prefixed_files(tmp_path: Path) -> None:
+    stale = tmp_path / f"{TEMP_FILE_PREFIX}stale.png"
+    fresh = tmp_path / f"{TEMP_FILE_PREFIX}fresh.png"
+    foreign = tmp_path / "other-stale.png"
+    for path in (stale, fresh, foreign):
+        path.write_bytes(b"fake")
+
+    old = time.time() - 7200
+    os.utime(stale, (old, old))
+    os.utime(foreign, (old, old))
+
+    removed = reap_orphan_temp_files(tmp_path, max_age_seconds=3600)
+
+    assert removed == 1
+    assert not stale.exists()
+    assert fresh.exists()
+    assert foreign.exists()